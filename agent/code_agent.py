@@ -1,6 +1,6 @@
 from typing import Dict, List, Any, Optional
 import json
-from logger import logger
+from utils.logger import logger
 
 from llm.structured_llm import StructuredLLM
 from tools.spec_tool import SpecTool
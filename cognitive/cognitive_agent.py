@@ -7,6 +7,7 @@ for generating high-quality, explainable code with line-by-line reasoning.
 
 from typing import Dict, List, Optional, Any, Tuple
 from pydantic import BaseModel, Field
+import asyncio
 import time
 from datetime import datetime
 
@@ -114,11 +115,8 @@ class CognitiveCodeGenAgent:
         # Reset cognitive state
         self._reset_cognitive_state()
 
-        # Stage 1: Problem Comprehension
-        problem_understanding = self._comprehend_problem(request)
-
-        # Stage 2: Solution Planning
-        solution_plan = self._plan_solution(problem_understanding)
+        # Stage 1 & 2: Problem Comprehension + Solution Planning
+        problem_understanding, solution_plan = self._comprehend_and_plan(request)
 
         # Stage 3: Algorithm Design
         algorithm_design = self._design_algorithm(solution_plan)
@@ -136,8 +134,46 @@ class CognitiveCodeGenAgent:
         # Stage 7: Reflection
         reflection = self._reflect_on_solution(implementation, request)
 
-        # Generate line-by-line explanations using cognitive explainer
-        cognitive_explanation = self.line_explainer.explain_code_lines(
+        cognitive_explanation = self._explain_implementation(implementation, request)
+        cognitive_load = self._evaluate_cognitive_load(implementation, request)
+
+        return self._build_output(implementation, cognitive_explanation, cognitive_load)
+
+    async def agenerate_code(self, request: CognitiveCodeGenRequest) -> CognitiveCodeGenOutput:
+        """
+        Asynchronous variant of generate_code
+
+        Stages 1-7 depend on each other and run in order, each in a worker thread
+        so the event loop is not blocked by LLM calls. Reflection transitions the
+        cognitive state and extends the trace, so it also runs on its own; line
+        explanations and cognitive load evaluation only read the final implementation
+        and the finished trace, so those two run concurrently.
+        """
+        self.thinking_process.problem_statement = request.requirement
+        self._reset_cognitive_state()
+
+        problem_understanding, solution_plan = await asyncio.to_thread(self._comprehend_and_plan, request)
+        algorithm_design = await asyncio.to_thread(self._design_algorithm, solution_plan)
+        implementation = await asyncio.to_thread(self._implement_code, algorithm_design)
+        validation_result = await asyncio.to_thread(self._validate_solution, implementation, request)
+
+        if validation_result["needs_optimization"]:
+            implementation = await asyncio.to_thread(self._optimize_solution, implementation, validation_result)
+
+        reflection = await asyncio.to_thread(self._reflect_on_solution, implementation, request)
+
+        cognitive_explanation, cognitive_load = await asyncio.gather(
+            asyncio.to_thread(self._explain_implementation, implementation, request),
+            asyncio.to_thread(self._evaluate_cognitive_load, implementation, request)
+        )
+
+        return self._build_output(implementation, cognitive_explanation, cognitive_load)
+
+    def _explain_implementation(
+        self, implementation: Dict[str, Any], request: CognitiveCodeGenRequest
+    ) -> Dict[str, Any]:
+        """Generate line-by-line explanations using cognitive explainer"""
+        return self.line_explainer.explain_code_lines(
             implementation["code"],
             context={
                 "requirement": request.requirement,
@@ -146,6 +182,22 @@ class CognitiveCodeGenAgent:
             }
         )
 
+    def _evaluate_cognitive_load(
+        self, implementation: Dict[str, Any], request: CognitiveCodeGenRequest
+    ) -> CognitiveComplexity:
+        """Evaluate cognitive load of the final implementation"""
+        return self.cognitive_load_evaluator.evaluate_code_complexity(
+            implementation["code"],
+            {"requirement": request.requirement}
+        )
+
+    def _build_output(
+        self,
+        implementation: Dict[str, Any],
+        cognitive_explanation: Dict[str, Any],
+        cognitive_load: CognitiveComplexity
+    ) -> CognitiveCodeGenOutput:
+        """Assemble the final output from the implementation and its analyses"""
         # Extract line explanations for backward compatibility
         line_explanations = {}
         for line_num, exp in cognitive_explanation["line_explanations"].items():
@@ -155,12 +207,6 @@ class CognitiveCodeGenAgent:
                 f"程序员意图: {exp.programmer_intent}"
             )
 
-        # Evaluate cognitive load
-        cognitive_load = self.cognitive_load_evaluator.evaluate_code_complexity(
-            implementation["code"],
-            {"requirement": request.requirement}
-        )
-
         return CognitiveCodeGenOutput(
             generated_code=implementation["code"],
             explanation=implementation["explanation"],
@@ -229,12 +275,53 @@ class CognitiveCodeGenAgent:
             "timestamp": datetime.now().isoformat()
         })
 
-    def _comprehend_problem(self, request: CognitiveCodeGenRequest) -> Dict[str, Any]:
-        """Stage 1: Problem Comprehension with LLM"""
-        self._transition_to_stage(ThinkingStage.PROBLEM_COMPREHENSION, request.requirement)
+    def _comprehend_and_plan(
+        self, request: CognitiveCodeGenRequest
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Stages 1-2: Comprehension and planning
+
+        When the LLM supports composite output, both stages are answered by a
+        single call; otherwise (or if the merged call fails) each stage calls
+        the LLM on its own.
+        """
+        comprehension_result = None
+        planning_result = None
 
-        # Create detailed problem analysis prompt
-        comprehension_prompt = f"""
+        if hasattr(self.llm, "generate_structured_multi"):
+            merged_prompt = self._build_comprehension_prompt(request) + """
+        在完成问题理解之后，请基于你的理解继续制定解决方案计划：
+        1. 选择最合适的解决策略（如自顶向下、递归、动态规划等）
+        2. 解释选择该策略的理由
+        3. 列出实施的主要步骤
+        4. 确定步骤之间的依赖关系
+        5. 识别需要考虑的因素
+        6. 预见可能的挑战
+        7. 提供备选方案
+        8. 估计实施难度
+
+        请将问题理解和规划方案分别填入对应的结构化字段。
+        """
+            try:
+                parts = self.llm.generate_structured_multi(
+                    prompt=merged_prompt,
+                    output_schemas=[ProblemComprehension, SolutionPlan]
+                )
+                comprehension_result = parts["problem_comprehension"]
+                planning_result = parts["solution_plan"]
+            except Exception as e:
+                self.cognitive_trace["decisions"].append({
+                    "stage": "comprehension_and_planning",
+                    "issue": f"合并 LLM 调用失败: {str(e)}",
+                    "fallback": "逐阶段调用"
+                })
+
+        problem_understanding = self._comprehend_problem(request, comprehension_result)
+        solution_plan = self._plan_solution(problem_understanding, planning_result)
+        return problem_understanding, solution_plan
+
+    def _build_comprehension_prompt(self, request: CognitiveCodeGenRequest) -> str:
+        """Build the problem comprehension prompt"""
+        return f"""
         作为一个经验丰富的程序员，请仔细分析以下编程需求并提供详细的问题理解：
 
         需求描述: {request.requirement}
@@ -255,12 +342,21 @@ class CognitiveCodeGenAgent:
         请以结构化的方式回答，确保涵盖所有重要方面。
         """
 
+    def _comprehend_problem(
+        self,
+        request: CognitiveCodeGenRequest,
+        comprehension_result: Optional[ProblemComprehension] = None
+    ) -> Dict[str, Any]:
+        """Stage 1: Problem Comprehension with LLM"""
+        self._transition_to_stage(ThinkingStage.PROBLEM_COMPREHENSION, request.requirement)
+
         try:
-            # 使用 LLM 进行结构化分析
-            comprehension_result = self.llm.generate_structured(
-                prompt=comprehension_prompt,
-                output_schema=ProblemComprehension
-            )
+            if comprehension_result is None:
+                # 使用 LLM 进行结构化分析
+                comprehension_result = self.llm.generate_structured(
+                    prompt=self._build_comprehension_prompt(request),
+                    output_schema=ProblemComprehension
+                )
 
             # 将结构化结果转换为字典格式以保持兼容性
             understanding = {
@@ -325,12 +421,9 @@ class CognitiveCodeGenAgent:
 
         return understanding
 
-    def _plan_solution(self, problem_understanding: Dict[str, Any]) -> Dict[str, Any]:
-        """Stage 2: Solution Planning with LLM"""
-        self._transition_to_stage(ThinkingStage.SOLUTION_PLANNING, "Planning solution approach")
-
-        # Create solution planning prompt
-        planning_prompt = f"""
+    def _build_planning_prompt(self, problem_understanding: Dict[str, Any]) -> str:
+        """Build the solution planning prompt"""
+        return f"""
         基于对问题的理解，请制定详细的解决方案计划：
 
         问题目标: {problem_understanding['main_goal']}
@@ -354,12 +447,21 @@ class CognitiveCodeGenAgent:
         请提供结构化的规划方案。
         """
 
+    def _plan_solution(
+        self,
+        problem_understanding: Dict[str, Any],
+        planning_result: Optional[SolutionPlan] = None
+    ) -> Dict[str, Any]:
+        """Stage 2: Solution Planning with LLM"""
+        self._transition_to_stage(ThinkingStage.SOLUTION_PLANNING, "Planning solution approach")
+
         try:
-            # 使用 LLM 进行解决方案规划
-            planning_result = self.llm.generate_structured(
-                prompt=planning_prompt,
-                output_schema=SolutionPlan
-            )
+            if planning_result is None:
+                # 使用 LLM 进行解决方案规划
+                planning_result = self.llm.generate_structured(
+                    prompt=self._build_planning_prompt(problem_understanding),
+                    output_schema=SolutionPlan
+                )
 
             plan = {
                 "strategy": planning_result.chosen_strategy.value,
@@ -8,6 +8,8 @@
 from typing import Dict, List, Tuple, Optional, Any, Set
 from pydantic import BaseModel, Field
 from enum import Enum
+from collections import Counter
+import functools
 import re
 
 
@@ -20,6 +22,10 @@ class LineUtility(Enum):
     UNUSED = "unused"                 # 未使用（从未被引用）
 
 
+# 可以删除的行（冗余或未使用）
+REMOVABLE_UTILITIES = frozenset({LineUtility.REDUNDANT, LineUtility.UNUSED})
+
+
 class LineAnalysis(BaseModel):
     """单行代码的有效性分析"""
     line_number: int = Field(description="行号")
@@ -68,6 +74,7 @@ class LineEffectivenessValidator:
         self.variable_pattern = re.compile(r'\b([a-zA-Z_]\w*)\b')
         self.assignment_pattern = re.compile(r'(\w+)\s*=')
         self.usage_pattern = re.compile(r'(?:return|print|assert|raise|if|elif|while|for).*')
+        self.definition_pattern = re.compile(r'\b(\w+)\s*=')
 
     def analyze_code(self, code: str, function_goal: Optional[str] = None) -> CodeEffectivenessReport:
         """
@@ -82,28 +89,41 @@ class LineEffectivenessValidator:
         """
         lines = code.split('\n')
 
+        # 第1-3步：逐行分析并计算依赖关系
+        analyses = self._analyze_lines(lines)
+
+        # 第4步：评估有效性等级
+        self._evaluate_utility(analyses, function_goal)
+
+        # 第5步：生成报告
+        report = self._generate_report(analyses, lines)
+
+        return report
+
+    @classmethod
+    def clear_cache(cls):
+        """清空优化建议缓存"""
+        _suggest_optimizations_cached.cache_clear()
+
+    def _analyze_lines(self, lines: List[str]) -> List[LineAnalysis]:
+        """逐行分析并计算依赖关系（不涉及函数目标）"""
         # 第1步：建立变量和行的映射关系
         var_definitions = self._find_variable_definitions(lines)
         var_usages = self._find_variable_usages(lines)
 
-        # 第2步：分析每行的有效性
+        # 第2步：分析每行的有效性（重复行计数只统计一次）
+        line_counts = Counter(line.strip() for line in lines)
         analyses = []
         for line_num, line in enumerate(lines, 1):
             analysis = self._analyze_single_line(
-                line_num, line, lines, var_definitions, var_usages
+                line_num, line, line_counts, var_definitions, var_usages
             )
             analyses.append(analysis)
 
         # 第3步：计算依赖关系
         self._compute_dependencies(analyses)
 
-        # 第4步：评估有效性等级
-        self._evaluate_utility(analyses, function_goal)
-
-        # 第5步：生成报告
-        report = self._generate_report(analyses, lines)
-
-        return report
+        return analyses
 
     def _find_variable_definitions(self, lines: List[str]) -> Dict[str, List[int]]:
         """
@@ -150,7 +170,7 @@ class LineEffectivenessValidator:
 
                 if var_name not in usages:
                     usages[var_name] = []
-                if line_num not in usages[var_name]:
+                if usages[var_name][-1:] != [line_num]:
                     usages[var_name].append(line_num)
 
         return usages
@@ -159,7 +179,7 @@ class LineEffectivenessValidator:
         self,
         line_num: int,
         line: str,
-        all_lines: List[str],
+        line_counts: Dict[str, int],
         var_definitions: Dict[str, List[int]],
         var_usages: Dict[str, List[int]]
     ) -> LineAnalysis:
@@ -232,8 +252,7 @@ class LineEffectivenessValidator:
 
         # 检查是否重复
         if utility != LineUtility.UNUSED:
-            duplicate_count = sum(1 for l in all_lines if l.strip() == stripped)
-            if duplicate_count > 1:
+            if line_counts[stripped] > 1:
                 utility = LineUtility.REDUNDANT
                 reason = "重复的代码行"
                 suggestion = "删除重复行"
@@ -249,22 +268,26 @@ class LineEffectivenessValidator:
         )
 
     def _compute_dependencies(self, analyses: List[LineAnalysis]):
-        """计算行之间的依赖关系"""
+        """计算行之间的依赖关系
+
+        顺序扫描一遍，记录每个变量最近一次被赋值的行，
+        每行使用的变量直接依赖其最近的定义行。
+        """
+        last_definition: Dict[str, LineAnalysis] = {}
 
-        for i, analysis in enumerate(analyses):
+        for analysis in analyses:
             line = analysis.code_line.strip()
 
-            # 找这行使用的变量
-            used_vars = self.variable_pattern.findall(line)
+            # 找这行使用的变量，依赖该变量在此之前最近的定义行
+            for var in self.variable_pattern.findall(line):
+                definition = last_definition.get(var)
+                if definition is not None:
+                    analysis.dependencies.add(definition.line_number)
+                    definition.dependents.add(analysis.line_number)
 
-            for var in used_vars:
-                # 找该变量的定义行
-                for j in range(i - 1, -1, -1):
-                    prev_line = analyses[j].code_line.strip()
-                    if re.search(rf'\b{var}\s*=', prev_line):
-                        analysis.dependencies.add(analyses[j].line_number)
-                        analyses[j].dependents.add(analysis.line_number)
-                        break
+            # 记录本行定义的变量
+            for var in self.definition_pattern.findall(line):
+                last_definition[var] = analysis
 
     def _evaluate_utility(self, analyses: List[LineAnalysis], goal: Optional[str] = None):
         """评估每行的有用性等级（考虑依赖关系）"""
@@ -278,11 +301,13 @@ class LineEffectivenessValidator:
     def _generate_report(self, analyses: List[LineAnalysis], lines: List[str]) -> CodeEffectivenessReport:
         """生成有效性报告"""
 
-        essential_count = sum(1 for a in analyses if a.utility == LineUtility.ESSENTIAL)
-        important_count = sum(1 for a in analyses if a.utility == LineUtility.IMPORTANT)
-        optional_count = sum(1 for a in analyses if a.utility == LineUtility.OPTIONAL)
-        redundant_count = sum(1 for a in analyses if a.utility == LineUtility.REDUNDANT)
-        unused_count = sum(1 for a in analyses if a.utility == LineUtility.UNUSED)
+        # 一次遍历统计各有用性等级的行数
+        utility_counts = Counter(a.utility for a in analyses)
+        essential_count = utility_counts[LineUtility.ESSENTIAL]
+        important_count = utility_counts[LineUtility.IMPORTANT]
+        optional_count = utility_counts[LineUtility.OPTIONAL]
+        redundant_count = utility_counts[LineUtility.REDUNDANT]
+        unused_count = utility_counts[LineUtility.UNUSED]
 
         # 计算有效性评分
         total = len(analyses)
@@ -306,11 +331,12 @@ class LineEffectivenessValidator:
             recommendations.append("可选代码行较多，考虑精简代码")
 
         # 生成优化后的代码（删除冗余和未使用的行）
+        # analyses 与 lines 按行号一一对应，直接按行号索引
+        analysis_by_line = {a.line_number: a for a in analyses}
         optimized_lines = []
         for i, line in enumerate(lines, 1):
-            # 找对应的分析
-            analysis = next((a for a in analyses if a.line_number == i), None)
-            if analysis and analysis.utility not in (LineUtility.REDUNDANT, LineUtility.UNUSED):
+            analysis = analysis_by_line.get(i)
+            if analysis and analysis.utility not in REMOVABLE_UTILITIES:
                 optimized_lines.append(line)
 
         optimized_code = '\n'.join(optimized_lines) if optimized_lines else None
@@ -332,26 +358,41 @@ class LineEffectivenessValidator:
         """
         基于报告生成优化建议
 
+        建议只取决于各行的行号、有用性等级、建议文本和是否为注释，
+        以此为键缓存，refine 循环中重复分析同样的代码时不再重新格式化。
+
         Returns:
             优化建议列表
         """
-        suggestions = []
-
-        # 找需要删除的行
-        removable_lines = [
-            a for a in report.analysis
-            if a.utility in (LineUtility.REDUNDANT, LineUtility.UNUSED)
-        ]
-
-        if removable_lines:
-            suggestions.append(f"[REMOVE] Can be deleted: {[a.line_number for a in removable_lines]}")
-            for line_analysis in removable_lines:
-                if line_analysis.suggestion:
-                    suggestions.append(f"   Line {line_analysis.line_number}: {line_analysis.suggestion}")
-
-        # 建议合并或简化的地方
-        for analysis in report.analysis:
-            if analysis.utility == LineUtility.OPTIONAL and not analysis.code_line.strip().startswith('#'):
-                suggestions.append(f"[SIMPLIFY] Line {analysis.line_number} can be simplified or merged")
-
-        return suggestions
+        key = tuple(
+            (a.line_number, a.utility, a.suggestion, a.code_line.strip().startswith('#'))
+            for a in report.analysis
+        )
+        return list(_suggest_optimizations_cached(key))
+
+
+@functools.lru_cache(maxsize=128)
+def _suggest_optimizations_cached(
+    lines: Tuple[Tuple[int, LineUtility, Optional[str], bool], ...]
+) -> Tuple[str, ...]:
+    """按 (行号, 有用性等级, 建议, 是否注释) 序列缓存优化建议"""
+    suggestions = []
+
+    # 找需要删除的行
+    removable_lines = [
+        line for line in lines
+        if line[1] in REMOVABLE_UTILITIES
+    ]
+
+    if removable_lines:
+        suggestions.append(f"[REMOVE] Can be deleted: {[line[0] for line in removable_lines]}")
+        for line_number, _, suggestion, _ in removable_lines:
+            if suggestion:
+                suggestions.append(f"   Line {line_number}: {suggestion}")
+
+    # 建议合并或简化的地方
+    for line_number, utility, _, is_comment in lines:
+        if utility == LineUtility.OPTIONAL and not is_comment:
+            suggestions.append(f"[SIMPLIFY] Line {line_number} can be simplified or merged")
+
+    return tuple(suggestions)
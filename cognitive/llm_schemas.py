@@ -43,6 +43,7 @@ class ProblemComprehension(BaseModel):
 
     class Config:
         extra = "forbid"
+        frozen = True
 
 
 class SolutionStrategy(Enum):
@@ -70,6 +71,7 @@ class SolutionPlan(BaseModel):
 
     class Config:
         extra = "forbid"
+        frozen = True
 
 
 class AlgorithmComponent(BaseModel):
@@ -80,6 +82,9 @@ class AlgorithmComponent(BaseModel):
     output_type: str = Field(description="输出类型")
     complexity: str = Field(description="复杂度")
 
+    class Config:
+        frozen = True
+
 
 class AlgorithmDesign(BaseModel):
     """算法设计的结构化输出"""
@@ -96,6 +101,7 @@ class AlgorithmDesign(BaseModel):
 
     class Config:
         extra = "forbid"
+        frozen = True
 
 
 class CodeImplementation(BaseModel):
@@ -111,6 +117,7 @@ class CodeImplementation(BaseModel):
 
     class Config:
         extra = "forbid"
+        frozen = True
 
 
 class ValidationResult(BaseModel):
@@ -126,6 +133,7 @@ class ValidationResult(BaseModel):
 
     class Config:
         extra = "forbid"
+        frozen = True
 
 
 class OptimizationResult(BaseModel):
@@ -138,6 +146,7 @@ class OptimizationResult(BaseModel):
 
     class Config:
         extra = "forbid"
+        frozen = True
 
 
 class ReflectionInsight(BaseModel):
@@ -147,6 +156,9 @@ class ReflectionInsight(BaseModel):
     impact: str = Field(description="影响")
     confidence: float = Field(description="置信度", ge=0, le=1)
 
+    class Config:
+        frozen = True
+
 
 class SolutionReflection(BaseModel):
     """解决方案反思的结构化输出"""
@@ -160,4 +172,5 @@ class SolutionReflection(BaseModel):
     overall_satisfaction: float = Field(description="总体满意度", ge=0, le=1)
 
     class Config:
-        extra = "forbid"
\ No newline at end of file
+        extra = "forbid"
+        frozen = True
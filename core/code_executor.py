@@ -5,8 +5,9 @@
 """
 from dataclasses import dataclass
 from enum import Enum
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from contextlib import redirect_stdout, redirect_stderr
+import functools
 import json
 import time
 import io
@@ -15,6 +16,53 @@ import sys
 import os
 
 
+# 只包含安全的内置函数
+SAFE_BUILTIN_NAMES = frozenset({
+    'abs', 'all', 'any', 'bin', 'bool', 'bytearray', 'bytes',
+    'chr', 'complex', 'dict', 'divmod', 'enumerate', 'filter',
+    'float', 'format', 'frozenset', 'hex', 'int', 'isinstance',
+    'issubclass', 'iter', 'len', 'list', 'map', 'max', 'min',
+    'next', 'oct', 'ord', 'pow', 'print', 'range', 'repr',
+    'reversed', 'round', 'set', 'slice', 'sorted', 'str', 'sum',
+    'tuple', 'type', 'zip',
+    # 常用异常类型，生成的代码和测试驱动代码需要抛出/捕获它们
+    'Exception', 'ArithmeticError', 'AssertionError', 'IndexError',
+    'KeyError', 'LookupError', 'NotImplementedError', 'OverflowError',
+    'RecursionError', 'RuntimeError', 'StopIteration', 'TypeError',
+    'ValueError', 'ZeroDivisionError'
+})
+
+
+@functools.lru_cache(maxsize=1)
+def _safe_namespace_template() -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """构建一次安全命名空间模板（内置函数表和常用模块），供每次执行复制使用"""
+    import builtins
+    import math
+    import random
+    import datetime
+    import re
+
+    safe_builtins = {
+        name: getattr(builtins, name)
+        for name in SAFE_BUILTIN_NAMES
+        if hasattr(builtins, name)
+    }
+    modules = {
+        'math': math,
+        'random': random,
+        'datetime': datetime,
+        'json': json,
+        're': re,
+    }
+    return safe_builtins, modules
+
+
+@functools.lru_cache(maxsize=128)
+def _compile_cached(code: str):
+    """编译代码并缓存代码对象，验证/优化循环中重复执行相同代码时跳过重新编译"""
+    return compile(code, '<executed_code>', 'exec')
+
+
 class ExecutionStatus(Enum):
     """执行状态"""
     SUCCESS = "success"
@@ -127,7 +175,7 @@ class CodeExecutor:
             # 执行代码
             with redirect_stdout(stdout_capture), redirect_stderr(stderr_capture):
                 # 使用超时控制（简化版本，实际应用中可能需要更复杂的超时机制）
-                compiled_code = compile(code, '<executed_code>', 'exec')
+                compiled_code = _compile_cached(code)
                 exec(compiled_code, safe_globals, local_vars)
 
             execution_time = time.time() - start_time
@@ -185,44 +233,16 @@ class CodeExecutor:
 
     def _create_safe_globals(self, globals_dict: Optional[Dict] = None) -> Dict:
         """创建安全的全局命名空间"""
-        safe_builtins = {}
-
-        # 只包含安全的内置函数
-        safe_builtin_names = {
-            'abs', 'all', 'any', 'bin', 'bool', 'bytearray', 'bytes',
-            'chr', 'complex', 'dict', 'divmod', 'enumerate', 'filter',
-            'float', 'format', 'frozenset', 'hex', 'int', 'isinstance',
-            'issubclass', 'iter', 'len', 'list', 'map', 'max', 'min',
-            'next', 'oct', 'ord', 'pow', 'print', 'range', 'repr',
-            'reversed', 'round', 'set', 'slice', 'sorted', 'str', 'sum',
-            'tuple', 'type', 'zip'
-        }
-
-        import builtins
-        for name in safe_builtin_names:
-            if hasattr(builtins, name):
-                safe_builtins[name] = getattr(builtins, name)
+        builtins_template, modules = _safe_namespace_template()
 
         safe_globals = {
-            '__builtins__': safe_builtins,
+            '__builtins__': dict(builtins_template),
             '__name__': '__executed__',
             '__doc__': None,
         }
 
         # 添加常用的安全模块
-        import math
-        import random
-        import datetime
-        import json
-        import re
-
-        safe_globals.update({
-            'math': math,
-            'random': random,
-            'datetime': datetime,
-            'json': json,
-            're': re,
-        })
+        safe_globals.update(modules)
 
         # 合并用户提供的globals
         if globals_dict:
@@ -1,3 +1,4 @@
-from llm.structured_llm import StructuredLLM
+from llm.cache import SqliteLLMCache
+from llm.structured_llm import StructuredLLM, get_llm
 
-__all__ = ["StructuredLLM"]
\ No newline at end of file
+__all__ = ["SqliteLLMCache", "StructuredLLM", "get_llm"]
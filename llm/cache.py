@@ -0,0 +1,69 @@
+"""
+LLM响应磁盘缓存
+
+以请求键（模型、提示、schema等参数的哈希）为键，把结构化输出的JSON存入SQLite。
+相同请求再次出现时直接读取，不再调用API，适合反复运行的集成测试。
+"""
+import os
+import sqlite3
+import threading
+from typing import Optional
+
+# 默认缓存位置，可通过 LLM_CACHE_PATH 环境变量覆盖
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "codegen-x", "llm_cache.sqlite3"
+)
+
+
+class SqliteLLMCache:
+    """基于SQLite的LLM响应缓存（线程安全）"""
+
+    def __init__(self, path: Optional[str] = None):
+        """初始化缓存
+
+        Args:
+            path: 数据库文件路径，不提供则使用 LLM_CACHE_PATH 或默认路径
+        """
+        self.path = path or os.getenv("LLM_CACHE_PATH") or DEFAULT_CACHE_PATH
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存，未命中时返回None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str):
+        """写入（或覆盖）缓存"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def __repr__(self) -> str:
+        return f"SqliteLLMCache(path='{self.path}')"
@@ -3,10 +3,17 @@
 
 使用OpenAI的结构化输出API，支持任何兼容的API端点。
 """
-from pydantic import BaseModel
-from typing import Type, TypeVar, List, Dict, Any, Optional
+from pydantic import BaseModel, ValidationError, create_model
+from typing import Type, TypeVar, List, Dict, Any, Optional, Tuple
+from concurrent.futures import Future
+import functools
+import hashlib
+import json
 import os
 import logging
+import threading
+
+from llm.cache import SqliteLLMCache
 
 # 设置日志
 logger = logging.getLogger(__name__)
@@ -14,6 +21,25 @@ logger = logging.getLogger(__name__)
 T = TypeVar('T', bound=BaseModel)
 
 
+def _schema_field_name(schema: Type[BaseModel]) -> str:
+    """将schema类名转换为组合模型中的字段名（ProblemComprehension -> problem_comprehension）"""
+    name = schema.__name__
+    return "".join(
+        f"_{ch.lower()}" if ch.isupper() and i > 0 else ch.lower()
+        for i, ch in enumerate(name)
+    )
+
+
+@functools.lru_cache(maxsize=32)
+def _composite_schema(schemas: Tuple[Type[BaseModel], ...]) -> Type[BaseModel]:
+    """为一组schema构建（并缓存）组合模型，每个schema对应一个字段"""
+    fields = {_schema_field_name(schema): (schema, ...) for schema in schemas}
+    if len(fields) != len(schemas):
+        raise ValueError("组合输出中的schema名称不能重复")
+    model_name = "Composite_" + "_".join(schema.__name__ for schema in schemas)
+    return create_model(model_name, **fields)
+
+
 class StructuredLLM:
     """结构化LLM包装器
 
@@ -25,7 +51,8 @@ class StructuredLLM:
         model: str = "gpt-4o-2024-08-06",
         api_key: Optional[str] = None,
         base_url: Optional[str] = None,
-        timeout: float = 60.0
+        timeout: float = 60.0,
+        cache: Optional[SqliteLLMCache] = None
     ):
         """初始化LLM
 
@@ -34,6 +61,7 @@ class StructuredLLM:
             api_key: API密钥，如果不提供则从环境变量读取
             base_url: API基础URL，用于支持兼容OpenAI的服务
             timeout: 请求超时时间
+            cache: 结构化输出的磁盘缓存；不提供时，设置 LLM_CACHE=1 则使用默认缓存
         """
         self.model = model
         self.timeout = timeout
@@ -51,6 +79,15 @@ class StructuredLLM:
         self._client = None
         self._call_count = 0
         self._total_tokens = 0
+        self._stats_lock = threading.Lock()  # 实例可能被多个Worker线程共用
+
+        # 进行中的请求：相同请求并发到达时共享同一次API调用
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+
+        if cache is None and os.getenv("LLM_CACHE") == "1":
+            cache = SqliteLLMCache()
+        self.cache = cache
 
     @property
     def client(self):
@@ -93,6 +130,115 @@ class StructuredLLM:
             ValueError: 当输出不符合schema时
             Exception: 当API调用失败时
         """
+        key = self._request_key(prompt, output_schema, system, temperature, max_tokens)
+
+        if self.cache is not None:
+            cached = self._load_cached(key, output_schema)
+            if cached is not None:
+                return cached
+
+        with self._inflight_lock:
+            pending = self._inflight.get(key)
+            if pending is None:
+                future: Future = Future()
+                self._inflight[key] = future
+
+        if pending is not None:
+            logger.debug("合并进行中的相同请求: %s", output_schema.__name__)
+            return pending.result()
+
+        try:
+            result = self._call_structured(prompt, output_schema, system, temperature, max_tokens)
+            if self.cache is not None:
+                self.cache.set(key, result.model_dump_json())
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def generate_structured_multi(
+        self,
+        prompt: str,
+        output_schemas: List[Type[BaseModel]],
+        system: str = "You are a helpful assistant.",
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> Dict[str, BaseModel]:
+        """一次调用生成多个结构化输出
+
+        将多个schema组合为一个模型，让链式的多个阶段在同一次请求中完成，
+        节省多次往返和重复的提示token。
+
+        Args:
+            prompt: 用户提示（应说明每个部分需要输出的内容）
+            output_schemas: 输出的Pydantic模型类列表
+            system: 系统提示
+            temperature: 温度参数
+            max_tokens: 最大token数
+
+        Returns:
+            {字段名: 对应schema的对象}，字段名为schema类名的snake_case形式
+        """
+        composite = _composite_schema(tuple(output_schemas))
+        parsed = self.generate_structured(
+            prompt=prompt,
+            output_schema=composite,
+            system=system,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        return {name: getattr(parsed, name) for name in composite.model_fields}
+
+    def _load_cached(self, key: str, output_schema: Type[T]) -> Optional[T]:
+        """从磁盘缓存读取结构化输出，未命中或与当前schema不匹配时返回None"""
+        cached = self.cache.get(key)
+        if cached is None:
+            return None
+        try:
+            result = output_schema.model_validate_json(cached)
+        except ValidationError:
+            logger.debug("缓存内容与schema不匹配，重新请求: %s", output_schema.__name__)
+            return None
+        logger.debug("命中磁盘缓存: %s", output_schema.__name__)
+        return result
+
+    def _request_key(
+        self,
+        prompt: str,
+        output_schema: Type[T],
+        system: str,
+        temperature: float,
+        max_tokens: Optional[int]
+    ) -> str:
+        """计算请求的唯一键，用于合并并发的相同请求
+
+        键也会写入磁盘缓存，因此固定使用紧凑、按键排序的JSON和sha256，
+        保证不同环境下同一请求得到相同的键。
+        """
+        payload = {
+            "model": self.model,
+            "system": system,
+            "prompt": prompt,
+            "schema": f"{output_schema.__module__}.{output_schema.__qualname__}",
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        data = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def _call_structured(
+        self,
+        prompt: str,
+        output_schema: Type[T],
+        system: str,
+        temperature: float,
+        max_tokens: Optional[int]
+    ) -> T:
+        """实际发起结构化输出的API调用"""
         try:
             kwargs = {
                 "model": self.model,
@@ -109,17 +255,14 @@ class StructuredLLM:
 
             response = self.client.beta.chat.completions.parse(**kwargs)
 
-            # 更新统计信息
-            self._call_count += 1
-            if hasattr(response, 'usage') and response.usage:
-                self._total_tokens += response.usage.total_tokens
+            self._record_usage(response)
 
             parsed_result = response.choices[0].message.parsed
 
             if parsed_result is None:
                 raise ValueError("LLM返回的结果无法解析为指定的schema")
 
-            logger.debug(f"结构化输出成功: {output_schema.__name__}")
+            logger.debug("结构化输出成功: %s", output_schema.__name__)
             return parsed_result
 
         except Exception as e:
@@ -159,10 +302,7 @@ class StructuredLLM:
 
             response = self.client.chat.completions.create(**kwargs)
 
-            # 更新统计信息
-            self._call_count += 1
-            if hasattr(response, 'usage') and response.usage:
-                self._total_tokens += response.usage.total_tokens
+            self._record_usage(response)
 
             return response.choices[0].message.content
 
@@ -170,15 +310,41 @@ class StructuredLLM:
             logger.error(f"简单调用失败: {str(e)}")
             raise
 
+    def _record_usage(self, response: Any):
+        """更新调用统计信息"""
+        tokens = response.usage.total_tokens if getattr(response, 'usage', None) else 0
+        with self._stats_lock:
+            self._call_count += 1
+            self._total_tokens += tokens
+
     def get_stats(self) -> Dict[str, Any]:
         """获取调用统计信息"""
+        with self._stats_lock:
+            call_count, total_tokens = self._call_count, self._total_tokens
         return {
             "model": self.model,
-            "call_count": self._call_count,
-            "total_tokens": self._total_tokens,
-            "average_tokens": self._total_tokens / max(1, self._call_count)
+            "call_count": call_count,
+            "total_tokens": total_tokens,
+            "average_tokens": total_tokens / max(1, call_count)
         }
 
     def __repr__(self) -> str:
         """字符串表示"""
         return f"StructuredLLM(model='{self.model}', calls={self._call_count})"
+
+
+@functools.lru_cache(maxsize=8)
+def get_llm(model: str = "gpt-4o-2024-08-06", base_url: Optional[str] = None) -> StructuredLLM:
+    """获取共享的LLM实例
+
+    相同 (model, base_url) 复用同一个实例，从而复用OpenAI客户端连接池和进行中的请求表，
+    环境变量也只在首次创建时读取。
+
+    Args:
+        model: 模型名称
+        base_url: API基础URL，不提供则从环境变量读取
+
+    Returns:
+        StructuredLLM实例
+    """
+    return StructuredLLM(model=model, base_url=base_url)
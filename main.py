@@ -4,11 +4,13 @@ CodeGen-X - 简化的主入口
 使用Agent + Tools架构的AI代码生成系统。
 """
 import argparse
+import io
+import itertools
 import json
 from pathlib import Path
 from typing import Optional
 
-from llm import StructuredLLM
+from llm import get_llm
 from agent import CodeGenAgent
 from agent.cognitive_code_agent import CognitiveDrivenCodeGenAgent
 from utils import logger, set_log_level
@@ -80,7 +82,7 @@ def main():
 
     try:
         # 初始化LLM和Agent
-        llm = StructuredLLM(model=args.model)
+        llm = get_llm(args.model)
 
         if args.cognitive:
             logger.info(f"初始化认知驱动 CodeGen-X (模型: {args.model})")
@@ -228,18 +230,18 @@ def print_success_summary(result: dict, output_dir: Optional[str] = None, is_cog
 
     print(f"\n📄 生成的代码:\n")
     print("```python")
-    # 只显示前20行，避免输出过长
-    code_lines = result["code"].split('\n')
-    for i, line in enumerate(code_lines[:20]):
-        print(line)
-    if len(code_lines) > 20:
-        print(f"... (还有 {len(code_lines) - 20} 行)")
+    # 只显示前20行，避免输出过长（不物化整份代码的行列表）
+    total_lines = result["code"].count("\n") + 1
+    for line in itertools.islice(io.StringIO(result["code"]), 20):
+        print(line.rstrip("\r\n"))
+    if total_lines > 20:
+        print(f"... (还有 {total_lines - 20} 行)")
     print("```")
 
     # 如果是认知模式，显示认知洞察
     if is_cognitive and "cognitive_decisions" in result:
         print(f"\n🧠 认知决策过程:")
-        for i, decision in enumerate(result["cognitive_decisions"][:3], 1):  # 只显示前3个
+        for i, decision in enumerate(itertools.islice(result["cognitive_decisions"], 3), 1):  # 只显示前3个
             print(f"   {i}. [{decision['stage']}] {decision['decision']}")
         if len(result["cognitive_decisions"]) > 3:
             print(f"   ... (还有 {len(result['cognitive_decisions']) - 3} 个决策)")
@@ -1,6 +1,8 @@
 """
 行有效性验证集成测试
 
+pytest 运行参数化的断言测试；直接运行本脚本则输出完整的演示过程。
+
 这个脚本测试改进后的代码生成系统，确保：
 1. ImplementTool 生成代码时考虑行有效性
 2. ValidateTool 能够检查和报告行有效性
@@ -8,27 +10,78 @@
 """
 
 import sys
-import os
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import io
+import contextlib
+
+import pytest
+
+# 模块顶层只导入构建规范常量所需的类型；验证器、工具等在用到时再导入，
+# 使只选择部分测试（如 pytest -k）时的收集开销更小
+from tools.spec_tool import FunctionSpec, Parameter, Example
+
+# 多个测试共用的规范，只构建（校验）一次；测试中不要修改它们
+_SPEC_REMOVE_DUPES = FunctionSpec(
+    name="remove_duplicates",
+    purpose="从列表中移除重复元素，保持相对顺序",
+    parameters=[
+        Parameter(
+            name="arr",
+            type="List[int]",
+            description="包含可能重复元素的列表"
+        )
+    ],
+    return_type="List[int]",
+    return_description="去重后的列表",
+    examples=[
+        Example(
+            inputs={"arr": [1, 1, 2, 2, 3]},
+            expected_output=[1, 2, 3],
+            description="包含重复元素的列表"
+        ),
+        Example(
+            inputs={"arr": []},
+            expected_output=[],
+            description="空列表"
+        ),
+        Example(
+            inputs={"arr": [1]},
+            expected_output=[1],
+            description="单元素列表"
+        ),
+    ],
+    edge_cases=["空列表", "单元素列表", "已排序的列表", "所有元素相同"],
+    exceptions=[],
+    notes="应该保持元素的相对顺序"
+)
 
-from cognitive.line_effectiveness_validator import LineEffectivenessValidator, LineUtility
-from tools.spec_tool import (
-    FunctionSpec, Parameter, Example, ExceptionCase
+_SPEC_BINARY_SEARCH = FunctionSpec(
+    name="binary_search",
+    purpose="在排序数组中进行二分查找",
+    parameters=[
+        Parameter(name="arr", type="List[int]", description="排序的数组"),
+        Parameter(name="target", type="int", description="目标值")
+    ],
+    return_type="int",
+    return_description="目标值的索引，未找到返回-1",
+    examples=[
+        Example(
+            inputs={"arr": [1, 3, 5, 7, 9], "target": 5},
+            expected_output=2,
+            description="目标值在数组中"
+        ),
+        Example(
+            inputs={"arr": [1, 3, 5, 7, 9], "target": 10},
+            expected_output=-1,
+            description="目标值不在数组中"
+        ),
+    ],
+    edge_cases=["空数组", "目标值在开头", "目标值在末尾"],
+    exceptions=[]
 )
-from tools.implement_tool import ImplementTool
-from tools.validate_tool import ValidateTool
-from tools.refine_tool import RefineTool
 
-# 模拟的LLM用于测试
-class MockStructuredLLM:
-    """模拟的结构化LLM"""
 
-    def generate_structured(self, prompt, output_schema, **kwargs):
-        """返回模拟的响应"""
-        from tools.implement_tool import Implementation
-
-        # 模拟：包含冗余代码的实现
-        mock_code = '''def remove_duplicates(arr):
+# 模拟LLM返回的实现代码（包含冗余行）
+_MOCK_REMOVE_DUPES_CODE = '''def remove_duplicates(arr):
     # 初始化结果列表
     result = []
     result = []  # 冗余赋值
@@ -47,55 +100,135 @@ class MockStructuredLLM:
     return result
 '''
 
-        mock_tests = [
-            "assert remove_duplicates([1, 1, 2, 2, 3]) == [1, 2, 3]",
-            "assert remove_duplicates([]) == []",
-            "assert remove_duplicates([1]) == [1]",
-            "assert remove_duplicates([1, 2, 3]) == [1, 2, 3]",
-        ]
-
-        if output_schema.__name__ == 'Implementation':
-            return Implementation(
-                code=mock_code,
-                explanation="这是一个移除重复元素的实现",
-                test_cases=mock_tests
-            )
-
-        return None
-
-
-def test_line_effectiveness_validation_directly():
-    """直接测试行有效性验证"""
-    print("=" * 70)
-    print("Test 1: Direct Line Effectiveness Validation")
-    print("=" * 70)
-
-    # 包含冗余代码的样本
-    sample_code = '''def remove_duplicates(arr):
-    # 初始化结果列表
+_REDUNDANT_REMOVE_DUPES_CODE = '''def remove_duplicates(arr):
     result = []
     result = []  # 冗余赋值
-
     seen = set()
-    temp_var = None  # 未使用的变量
+    temp = None  # 未使用的变量
 
     for num in arr:
         if num not in seen:
             result.append(num)
             seen.add(num)
 
-    # 没有实际用途的中间变量
-    unused = len(result)
+    return result
+'''
+
+_REDUNDANT_BINARY_SEARCH_CODE = '''def binary_search(arr, target):
+    left = 0
+    right = len(arr) - 1
+    left = 0  # 冗余赋值
+    result = -1  # 未使用
+
+    while left <= right:
+        mid = (left + right) // 2
+        if arr[mid] == target:
+            return mid
+        elif arr[mid] < target:
+            left = mid + 1
+        else:
+            right = mid - 1
 
     return result
 '''
 
+_OPTIMIZED_BINARY_SEARCH_CODE = '''def binary_search(arr, target):
+    left = 0
+    right = len(arr) - 1
+
+    while left <= right:
+        mid = (left + right) // 2
+        if arr[mid] == target:
+            return mid
+        elif arr[mid] < target:
+            left = mid + 1
+        else:
+            right = mid - 1
+
+    return -1
+'''
+
+
+# 模拟的LLM用于测试
+class MockStructuredLLM:
+    """模拟的结构化LLM"""
+
+    def __init__(self):
+        from tools.implement_tool import Implementation
+
+        self.call_count = 0
+        self._dispatch = {Implementation: self._make_implementation}
+
+    def generate_structured(self, prompt, output_schema, **kwargs):
+        """返回模拟的响应"""
+        self.call_count += 1
+        factory = self._dispatch.get(output_schema)
+        return factory() if factory is not None else None
+
+    def _make_implementation(self):
+        """模拟：包含冗余代码的实现"""
+        from tools.implement_tool import Implementation
+
+        return Implementation(
+            code=_MOCK_REMOVE_DUPES_CODE,
+            explanation="这是一个移除重复元素的实现",
+            test_cases=[
+                "assert remove_duplicates([1, 1, 2, 2, 3]) == [1, 2, 3]",
+                "assert remove_duplicates([]) == []",
+                "assert remove_duplicates([1]) == [1]",
+                "assert remove_duplicates([1, 2, 3]) == [1, 2, 3]",
+            ]
+        )
+
+
+@pytest.fixture(scope="module")
+def validator():
+    """整个模块共享一个行有效性验证器"""
+    from cognitive.line_effectiveness_validator import LineEffectivenessValidator
+
+    return LineEffectivenessValidator()
+
+
+@pytest.fixture(scope="module")
+def validate_tool():
+    """整个模块共享一个验证工具"""
+    from tools.validate_tool import ValidateTool
+
+    return ValidateTool()
+
+
+@pytest.mark.parametrize("code, spec, expected_removable", [
+    (_MOCK_REMOVE_DUPES_CODE, _SPEC_REMOVE_DUPES, 2),
+    (_REDUNDANT_REMOVE_DUPES_CODE, _SPEC_REMOVE_DUPES, 1),
+    (_REDUNDANT_BINARY_SEARCH_CODE, _SPEC_BINARY_SEARCH, 2),
+], ids=["mock_remove_duplicates", "remove_duplicates", "binary_search"])
+def test_line_effectiveness(validator, validate_tool, code, spec, expected_removable):
+    """测试包含冗余行的代码：功能正确，但行有效性检查能发现可删除的行"""
+    report = validator.analyze_code(code, spec.purpose)
+    assert report.redundant_lines + report.unused_lines == expected_removable
+    assert report.effectiveness_score < 1.0
+
+    result = validate_tool.execute(validate_tool.input_schema(code=code, spec=spec)).data
+    assert result.is_valid
+    assert result.has_redundant_code
+
+
+def demo_line_effectiveness_validation(validator):
+    """直接演示行有效性验证"""
+    from cognitive.line_effectiveness_validator import REMOVABLE_UTILITIES
+
+    print("=" * 70)
+    print("Test 1: Direct Line Effectiveness Validation")
+    print("=" * 70)
+
+    # 包含冗余代码的样本
+    sample_code = _MOCK_REMOVE_DUPES_CODE
+
     print("[SOURCE] Original Code:")
     print(sample_code)
     print()
 
     # 验证行有效性
-    validator = LineEffectivenessValidator()
     report = validator.analyze_code(sample_code, "从列表中移除重复元素")
 
     print("[ANALYSIS] Line Effectiveness Analysis Result:")
@@ -111,7 +244,7 @@ def test_line_effectiveness_validation_directly():
     # 显示问题行
     print("[ISSUES] Problematic Lines Found:")
     for analysis in report.analysis:
-        if analysis.utility in [LineUtility.UNUSED, LineUtility.REDUNDANT]:
+        if analysis.utility in REMOVABLE_UTILITIES:
             print(f"  [{analysis.utility.value.upper()}] Line {analysis.line_number}: {analysis.code_line.strip()}")
             print(f"    -> {analysis.reason}")
             if analysis.suggestion:
@@ -134,61 +267,14 @@ def test_line_effectiveness_validation_directly():
     return report
 
 
-def test_validate_tool_integration():
-    """测试ValidateTool的行有效性集成"""
+def demo_validate_tool_integration(validate_tool):
+    """演示ValidateTool的行有效性集成"""
     print("=" * 70)
     print("Test 2: ValidateTool Line Effectiveness Integration")
     print("=" * 70)
 
-    # 创建示例规范
-    spec = FunctionSpec(
-        name="remove_duplicates",
-        purpose="从列表中移除重复元素，保持相对顺序",
-        parameters=[
-            Parameter(
-                name="arr",
-                type="List[int]",
-                description="包含可能重复元素的列表"
-            )
-        ],
-        return_type="List[int]",
-        return_description="去重后的列表",
-        examples=[
-            Example(
-                inputs={"arr": [1, 1, 2, 2, 3]},
-                expected_output=[1, 2, 3],
-                description="包含重复元素的列表"
-            ),
-            Example(
-                inputs={"arr": []},
-                expected_output=[],
-                description="空列表"
-            ),
-            Example(
-                inputs={"arr": [1]},
-                expected_output=[1],
-                description="单元素列表"
-            ),
-        ],
-        edge_cases=["空列表", "单元素列表", "已排序的列表", "所有元素相同"],
-        exceptions=[],
-        notes="应该保持元素的相对顺序"
-    )
-
     # 包含冗余的代码
-    code_with_redundancy = '''def remove_duplicates(arr):
-    result = []
-    result = []  # 冗余赋值
-    seen = set()
-    temp = None  # 未使用的变量
-
-    for num in arr:
-        if num not in seen:
-            result.append(num)
-            seen.add(num)
-
-    return result
-'''
+    code_with_redundancy = _REDUNDANT_REMOVE_DUPES_CODE
 
     print("[SPEC] Requirement: Remove duplicates from list")
     print("[CODE] Implementation:")
@@ -196,9 +282,8 @@ def test_validate_tool_integration():
     print()
 
     # 验证代码
-    validate_tool = ValidateTool()
     validation_result = validate_tool.execute(
-        validate_tool.input_schema(code=code_with_redundancy, spec=spec)
+        validate_tool.input_schema(code=code_with_redundancy, spec=_SPEC_REMOVE_DUPES)
     )
 
     print("[RESULT] Validation Results:")
@@ -225,56 +310,14 @@ def test_validate_tool_integration():
     return validation_result
 
 
-def test_refine_tool_with_line_effectiveness():
-    """测试RefineTool基于行有效性进行优化"""
+def demo_refine_tool_with_line_effectiveness(validator):
+    """演示RefineTool基于行有效性进行优化"""
     print("=" * 70)
     print("Test 3: RefineTool Line Effectiveness Optimization")
     print("=" * 70)
 
-    # 先创建一个验证结果
-    spec = FunctionSpec(
-        name="binary_search",
-        purpose="在排序数组中进行二分查找",
-        parameters=[
-            Parameter(name="arr", type="List[int]", description="排序的数组"),
-            Parameter(name="target", type="int", description="目标值")
-        ],
-        return_type="int",
-        return_description="目标值的索引，未找到返回-1",
-        examples=[
-            Example(
-                inputs={"arr": [1, 3, 5, 7, 9], "target": 5},
-                expected_output=2,
-                description="目标值在数组中"
-            ),
-            Example(
-                inputs={"arr": [1, 3, 5, 7, 9], "target": 10},
-                expected_output=-1,
-                description="目标值不在数组中"
-            ),
-        ],
-        edge_cases=["空数组", "目标值在开头", "目标值在末尾"],
-        exceptions=[]
-    )
-
     # 包含冗余的代码
-    code = '''def binary_search(arr, target):
-    left = 0
-    right = len(arr) - 1
-    left = 0  # 冗余赋值
-    result = -1  # 未使用
-
-    while left <= right:
-        mid = (left + right) // 2
-        if arr[mid] == target:
-            return mid
-        elif arr[mid] < target:
-            left = mid + 1
-        else:
-            right = mid - 1
-
-    return result
-'''
+    code = _REDUNDANT_BINARY_SEARCH_CODE
 
     print("[CODE] Original Code with Redundancy:")
     print(code)
@@ -339,40 +382,25 @@ directly contributes to the logic implementation.
 
     # 展示优化后的预期代码
     print("[EXPECTED] Optimized Code:")
-    optimized_code = '''def binary_search(arr, target):
-    left = 0
-    right = len(arr) - 1
-
-    while left <= right:
-        mid = (left + right) // 2
-        if arr[mid] == target:
-            return mid
-        elif arr[mid] < target:
-            left = mid + 1
-        else:
-            right = mid - 1
-
-    return -1
-'''
+    optimized_code = _OPTIMIZED_BINARY_SEARCH_CODE
     print(optimized_code)
     print()
 
     # 再次验证优化后的代码
     print("[IMPROVEMENT] Post-Optimization Code Quality:")
-    validator = LineEffectivenessValidator()
-    report = validator.analyze_code(optimized_code, spec.purpose)
+    report = validator.analyze_code(optimized_code, _SPEC_BINARY_SEARCH.purpose)
     print(f"  - Line Effectiveness Score: {report.effectiveness_score:.2f}/1.0 (improved from {validation.line_effectiveness_score:.2f})")
     print(f"  - Redundant lines: {report.redundant_lines} (reduced from {analysis['redundant_lines']})")
     print(f"  - Unused lines: {report.unused_lines} (reduced from {analysis['unused_lines']})")
     print()
 
 
-def print_summary():
-    """打印总结"""
-    print("=" * 70)
-    print("SUMMARY: Line Effectiveness Improvements")
-    print("=" * 70)
-    print("""
+# 总结横幅是静态文本：导入时构建并编码一次
+_SUMMARY = "\n".join([
+    "=" * 70,
+    "SUMMARY: Line Effectiveness Improvements",
+    "=" * 70,
+    """
 Improvements Implemented:
 
 1. DONE: ImplementTool Prompt Enhancement
@@ -427,7 +455,34 @@ Improvements Implemented:
 
 These improvements ensure the code generation system produces not only
 functionally correct code, but also concise, efficient, and useful code.
-""")
+""",
+])
+_SUMMARY_BYTES = _SUMMARY.encode("utf-8")
+
+
+def print_summary():
+    """打印总结"""
+    stream = getattr(sys.stdout, "buffer", None)
+    if stream is None:
+        # 被替换为纯文本流（如测试捕获）时退回文本写入
+        sys.stdout.write(_SUMMARY + "\n")
+        return
+
+    # 先刷新文本层，保证与之前的 print 输出顺序一致
+    sys.stdout.flush()
+    stream.write(_SUMMARY_BYTES + b"\n")
+    stream.flush()
+
+
+@contextlib.contextmanager
+def _batched_stdout():
+    """将块内的输出先写入缓冲区，结束时一次性写到stdout"""
+    buffer = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(buffer):
+            yield
+    finally:
+        sys.stdout.write(buffer.getvalue())
 
 
 def main():
@@ -437,15 +492,25 @@ def main():
     print("=" * 70)
     print()
 
-    # 运行测试
-    test_line_effectiveness_validation_directly()
-    print()
+    from cognitive.line_effectiveness_validator import LineEffectivenessValidator
+    from tools.validate_tool import ValidateTool
 
-    test_validate_tool_integration()
-    print()
+    # 所有演示共用同一个验证器和验证工具
+    validator = LineEffectivenessValidator()
+    validate_tool = ValidateTool()
 
-    test_refine_tool_with_line_effectiveness()
-    print()
+    # 每个演示的输出缓冲后一次性写出
+    with _batched_stdout():
+        demo_line_effectiveness_validation(validator)
+        print()
+
+    with _batched_stdout():
+        demo_validate_tool_integration(validate_tool)
+        print()
+
+    with _batched_stdout():
+        demo_refine_tool_with_line_effectiveness(validator)
+        print()
 
     # 打印总结
     print_summary()
@@ -0,0 +1,12 @@
+"""
+pytest 共享配置
+
+在收集测试时把项目根目录加入 sys.path（只做一次），测试模块无需各自修改路径。
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = str(Path(__file__).resolve().parent.parent)
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -2,69 +2,40 @@
 测试新的Agent架构
 """
 import unittest
-from unittest.mock import Mock, MagicMock
-from pydantic import BaseModel, Field
+from unittest.mock import Mock, MagicMock, patch
+from pydantic import BaseModel, Field, ValidationError
 from typing import List
 
 from llm.structured_llm import StructuredLLM
 from agent.code_agent import CodeGenAgent
 from tools.spec_tool import FunctionSpec, Parameter, Example, ExceptionCase
+from tools.base import ToolOutput, ToolStatus
 from tools.implement_tool import Implementation
-from tools.validate_tool import ValidationResult, TestResult
-
-
-class MockStructuredLLM:
-    """Mock的StructuredLLM，用于测试"""
-
-    def __init__(self):
-        self.call_count = 0
-        self.responses = {}
-
-    def generate_structured(self, prompt: str, output_schema: type, **kwargs):
-        """模拟结构化输出"""
-        self.call_count += 1
-
-        # 根据output_schema返回不同的mock数据
-        if output_schema == FunctionSpec:
-            return FunctionSpec(
-                name="remove_duplicates",
-                purpose="从有序数组中删除重复元素",
-                parameters=[
-                    Parameter(
-                        name="nums",
-                        type="List[int]",
-                        description="有序整数数组",
-                        constraints="必须是有序的"
-                    )
-                ],
-                return_type="int",
-                return_description="去重后的数组长度",
-                examples=[
-                    Example(
-                        inputs={"nums": [1, 1, 2]},
-                        expected_output=2,
-                        description="简单情况"
-                    ),
-                    Example(
-                        inputs={"nums": []},
-                        expected_output=0,
-                        description="空数组"
-                    )
-                ],
-                edge_cases=["空数组", "所有元素相同", "无重复元素"],
-                exceptions=[
-                    ExceptionCase(
-                        type="TypeError",
-                        condition="输入不是列表"
-                    )
-                ],
-                complexity="O(n) 时间, O(1) 空间",
-                notes="原地修改数组"
-            )
-
-        elif output_schema == Implementation:
-            # 返回一个正确的实现
-            code = '''def remove_duplicates(nums: List[int]) -> int:
+from tools.validate_tool import ValidationResult, TestResult, clear_validation_cache
+
+
+# 多个测试共用的规范，只构建（校验）一次；测试中不要修改它们
+_SPEC_ADD = FunctionSpec(
+    name="add",
+    purpose="加法",
+    parameters=[
+        Parameter(name="a", type="int", description="第一个数"),
+        Parameter(name="b", type="int", description="第二个数")
+    ],
+    return_type="int",
+    return_description="和",
+    examples=[
+        Example(inputs={"a": 1, "b": 2}, expected_output=3),
+        Example(inputs={"a": 0, "b": 0}, expected_output=0)
+    ],
+    edge_cases=[],
+    exceptions=[]
+)
+
+_SPEC_ADD_SINGLE_EXAMPLE = _SPEC_ADD.model_copy(update={"examples": _SPEC_ADD.examples[:1]})
+
+# 模拟LLM返回的实现代码
+_MOCK_REMOVE_DUPES_CODE = '''def remove_duplicates(nums: List[int]) -> int:
     """从有序数组中删除重复元素"""
     if not nums:
         return 0
@@ -77,26 +48,86 @@ class MockStructuredLLM:
 
     return write_index
 '''
-            return Implementation(
-                code=code,
-                explanation="使用双指针法，一个指针遍历，一个指针记录写入位置",
-                test_cases=[
-                    "assert remove_duplicates([1,1,2]) == 2",
-                    "assert remove_duplicates([]) == 0"
-                ]
-            )
 
+
+class MockStructuredLLM:
+    """Mock的StructuredLLM，用于测试
+
+    响应对象只在初始化时构建一次，generate_structured 直接返回其引用。
+    """
+
+    def __init__(self):
+        self.call_count = 0
+        self._spec_response = FunctionSpec(
+            name="remove_duplicates",
+            purpose="从有序数组中删除重复元素",
+            parameters=[
+                Parameter(
+                    name="nums",
+                    type="List[int]",
+                    description="有序整数数组",
+                    constraints="必须是有序的"
+                )
+            ],
+            return_type="int",
+            return_description="去重后的数组长度",
+            examples=[
+                Example(
+                    inputs={"nums": [1, 1, 2]},
+                    expected_output=2,
+                    description="简单情况"
+                ),
+                Example(
+                    inputs={"nums": []},
+                    expected_output=0,
+                    description="空数组"
+                )
+            ],
+            edge_cases=["空数组", "所有元素相同", "无重复元素"],
+            exceptions=[
+                ExceptionCase(
+                    type="TypeError",
+                    condition="输入不是列表"
+                )
+            ],
+            complexity="O(n) 时间, O(1) 空间",
+            notes="原地修改数组"
+        )
+
+        self._impl_response = Implementation(
+            code=_MOCK_REMOVE_DUPES_CODE,
+            explanation="使用双指针法，一个指针遍历，一个指针记录写入位置",
+            test_cases=[
+                "assert remove_duplicates([1,1,2]) == 2",
+                "assert remove_duplicates([]) == 0"
+            ]
+        )
+
+        self.responses = {
+            FunctionSpec: self._spec_response,
+            Implementation: self._impl_response,
+        }
+
+    def generate_structured(self, prompt: str, output_schema: type, **kwargs):
+        """模拟结构化输出"""
+        self.call_count += 1
+        response = self.responses.get(output_schema)
         # 默认返回空对象
-        return output_schema()
+        return response if response is not None else output_schema()
 
 
 class TestCodeGenAgent(unittest.TestCase):
     """测试CodeGenAgent"""
 
+    @classmethod
+    def setUpClass(cls):
+        """设置测试环境（所有测试共享LLM和Agent）"""
+        cls.mock_llm = MockStructuredLLM()
+        cls.agent = CodeGenAgent(cls.mock_llm, max_refine_attempts=2)
+
     def setUp(self):
-        """设置测试环境"""
-        self.mock_llm = MockStructuredLLM()
-        self.agent = CodeGenAgent(self.mock_llm, max_refine_attempts=2)
+        """重置调用计数"""
+        self.mock_llm.call_count = 0
 
     def test_agent_initialization(self):
         """测试Agent初始化"""
@@ -107,6 +138,30 @@ class TestCodeGenAgent(unittest.TestCase):
         self.assertIn("validate_code", self.agent.tools)
         self.assertIn("refine_code", self.agent.tools)
 
+    def test_tool_schema_cached_and_independent(self):
+        """测试工具schema重复生成结果一致，且修改返回值不影响后续调用"""
+        first = self.agent._get_tool_schemas()
+        first[0]["function"]["parameters"]["properties"].clear()
+        second = self.agent._get_tool_schemas()
+
+        self.assertTrue(second[0]["function"]["parameters"]["properties"])
+        for tool, schema in zip(self.agent.tools.values(), second):
+            self.assertEqual(schema["function"]["parameters"], tool.input_schema.model_json_schema())
+
+    def test_tool_output_factories(self):
+        """测试工具输出工厂方法生成的结果字段完整且可序列化"""
+        ok = ToolOutput.success_result(data=1, message="完成", source="test")
+        failed = ToolOutput.error_result("失败")
+        warned = ToolOutput.warning_result(data=2, message="注意")
+
+        self.assertEqual(ok.status, ToolStatus.SUCCESS)
+        self.assertEqual(ok.metadata, {"source": "test"})
+        self.assertIsNone(ok.execution_time)
+        self.assertFalse(failed.success)
+        self.assertEqual(failed.status, ToolStatus.FAILURE)
+        self.assertEqual(warned.status, ToolStatus.WARNING)
+        self.assertEqual(ToolOutput.model_validate_json(ok.model_dump_json()), ok)
+
     def test_spec_tool(self):
         """测试SpecTool"""
         spec_tool = self.agent.tools["generate_spec"]
@@ -140,31 +195,13 @@ class TestCodeGenAgent(unittest.TestCase):
 
     def test_validate_tool(self):
         """测试ValidateTool"""
-        # 准备spec
-        spec = FunctionSpec(
-            name="add",
-            purpose="加法",
-            parameters=[
-                Parameter(name="a", type="int", description="第一个数"),
-                Parameter(name="b", type="int", description="第二个数")
-            ],
-            return_type="int",
-            return_description="和",
-            examples=[
-                Example(inputs={"a": 1, "b": 2}, expected_output=3),
-                Example(inputs={"a": 0, "b": 0}, expected_output=0)
-            ],
-            edge_cases=[],
-            exceptions=[]
-        )
-
         # 正确的代码
         code = "def add(a: int, b: int) -> int:\n    return a + b"
 
         validate_tool = self.agent.tools["validate_code"]
         result = validate_tool.execute(validate_tool.input_schema(
             code=code,
-            spec=spec
+            spec=_SPEC_ADD
         ))
 
         self.assertTrue(result.success)
@@ -174,29 +211,13 @@ class TestCodeGenAgent(unittest.TestCase):
 
     def test_validate_tool_with_wrong_code(self):
         """测试ValidateTool对错误代码的验证"""
-        spec = FunctionSpec(
-            name="add",
-            purpose="加法",
-            parameters=[
-                Parameter(name="a", type="int", description="第一个数"),
-                Parameter(name="b", type="int", description="第二个数")
-            ],
-            return_type="int",
-            return_description="和",
-            examples=[
-                Example(inputs={"a": 1, "b": 2}, expected_output=3)
-            ],
-            edge_cases=[],
-            exceptions=[]
-        )
-
         # 错误的代码（返回差而不是和）
         code = "def add(a: int, b: int) -> int:\n    return a - b"
 
         validate_tool = self.agent.tools["validate_code"]
         result = validate_tool.execute(validate_tool.input_schema(
             code=code,
-            spec=spec
+            spec=_SPEC_ADD_SINGLE_EXAMPLE
         ))
 
         self.assertTrue(result.success)
@@ -204,6 +225,50 @@ class TestCodeGenAgent(unittest.TestCase):
         self.assertFalse(validation.is_valid)
         self.assertEqual(validation.passed_count, 0)
 
+    def test_validate_tool_reports_failures_per_example(self):
+        """测试单个用例抛出异常时只有该用例失败，其余用例照常判定"""
+        code = (
+            "def add(a: int, b: int) -> int:\n"
+            "    if a == 0:\n"
+            "        raise ValueError('zero')\n"
+            "    return a + b"
+        )
+
+        validate_tool = self.agent.tools["validate_code"]
+        result = validate_tool.execute(validate_tool.input_schema(code=code, spec=_SPEC_ADD))
+
+        first, second = result.data.test_results
+        self.assertTrue(first.passed)
+        self.assertEqual(first.actual_output, 3)
+        self.assertFalse(second.passed)
+        self.assertIn("zero", second.error)
+
+    def test_validate_tool_cache(self):
+        """测试相同规范和代码的重复验证命中缓存，且返回结果互不影响"""
+        clear_validation_cache()
+        code = "def add(a: int, b: int) -> int:\n    return a + b"
+        validate_tool = self.agent.tools["validate_code"]
+
+        first = validate_tool.execute(validate_tool.input_schema(code=code, spec=_SPEC_ADD))
+        first.data.test_results.clear()
+        second = validate_tool.execute(validate_tool.input_schema(code=code, spec=_SPEC_ADD))
+
+        self.assertTrue(second.data.is_valid)
+        self.assertEqual(len(second.data.test_results), 2)
+
+    def test_validate_tool_does_not_cache_executor_failures(self):
+        """测试执行器异常导致的失败不会被缓存"""
+        clear_validation_cache()
+        code = "def add(a: int, b: int) -> int:\n    return a + b"
+        validate_tool = self.agent.tools["validate_code"]
+
+        with patch.object(validate_tool.executor, "run", side_effect=RuntimeError("busy")):
+            failed = validate_tool.execute(validate_tool.input_schema(code=code, spec=_SPEC_ADD))
+        retried = validate_tool.execute(validate_tool.input_schema(code=code, spec=_SPEC_ADD))
+
+        self.assertFalse(failed.data.is_valid)
+        self.assertTrue(retried.data.is_valid)
+
 
 class TestToolSchemas(unittest.TestCase):
     """测试工具的Schema定义"""
@@ -216,7 +281,7 @@ class TestToolSchemas(unittest.TestCase):
             parameters=[],
             return_type="None",
             return_description="无",
-            examples=[],
+            examples=[Example(inputs={}, expected_output=None)],
             edge_cases=[],
             exceptions=[]
         )
@@ -224,6 +289,21 @@ class TestToolSchemas(unittest.TestCase):
         # 测试可以转换为dict和JSON
         spec_dict = spec.model_dump()
         self.assertEqual(spec_dict["name"], "test")
+        self.assertEqual(FunctionSpec.model_validate_json(spec.model_dump_json()), spec)
+
+    def test_function_spec_requires_examples(self):
+        """测试FunctionSpec至少需要一个示例"""
+        with self.assertRaises(ValidationError):
+            FunctionSpec(
+                name="test",
+                purpose="测试",
+                parameters=[],
+                return_type="None",
+                return_description="无",
+                examples=[],
+                edge_cases=[],
+                exceptions=[]
+            )
 
     def test_implementation_schema(self):
         """测试Implementation可以正确序列化"""
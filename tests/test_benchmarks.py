@@ -0,0 +1,70 @@
+"""
+协作框架热点路径的微基准测试
+
+需要 pytest-benchmark，默认不运行：python -m pytest -m bench
+阈值只用来发现数量级上的性能回退，不代表具体机器上的期望耗时。
+"""
+
+import dataclasses
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from tools.collaborative_framework import (
+    CognitiveStage,
+    FusionResult,
+    FusionStrategy,
+    QualityMetrics,
+    create_default_workflow,
+    overall_scores,
+)
+
+pytestmark = pytest.mark.bench
+
+# 平均耗时上限（秒）
+_WORKFLOW_RUN_THRESHOLD = 1e-3
+_OVERALL_SCORES_THRESHOLD = 1e-3
+
+_RESULT = FusionResult(
+    stage=CognitiveStage.REQUIREMENT_ANALYSIS,
+    fused_content="",
+    fusion_strategy=FusionStrategy.BEST_SINGLE,
+    source_workers=["bench_worker"],
+    confidence=0.8,
+    quality_metrics=QualityMetrics(correctness=85.0, efficiency=80.0)
+)
+
+
+def test_bench_workflow_progress(benchmark):
+    """按依赖层级完成默认工作流的全部阶段并查询进度"""
+    workflow = create_default_workflow()
+    waves = workflow.get_execution_waves()
+    results = {
+        stage: dataclasses.replace(_RESULT, stage=stage)
+        for wave in waves for stage in wave
+    }
+
+    def run():
+        workflow.reset()
+        for wave in waves:
+            workflow.get_ready_stages()
+            for stage in wave:
+                workflow.mark_completed(stage, results[stage])
+        return workflow.get_progress()
+
+    assert benchmark(run) == 1.0
+    assert benchmark.stats["mean"] < _WORKFLOW_RUN_THRESHOLD
+
+
+def test_bench_overall_scores(benchmark):
+    """批量计算数百个阶段输出的综合得分"""
+    metrics = [
+        QualityMetrics(correctness=float(i % 100), efficiency=50.0, security=70.0)
+        for i in range(500)
+    ]
+
+    scores = benchmark(overall_scores, metrics)
+
+    assert len(scores) == len(metrics)
+    assert benchmark.stats["mean"] < _OVERALL_SCORES_THRESHOLD
@@ -0,0 +1,119 @@
+"""
+认知驱动系统快速测试
+
+测试认知模块导入、基本功能以及行有效性验证是否正常工作
+"""
+
+import pytest
+from unittest.mock import patch
+
+from cognitive.cognitive_model import CognitiveModel, CognitiveState, ThinkingStage
+from cognitive.cognitive_line_explainer import CognitiveLineExplainer
+from cognitive.line_effectiveness_validator import LineEffectivenessValidator
+from cognitive.cognitive_decision_tracker import CognitiveDecisionTracker, DecisionType
+from cognitive.cognitive_load_aware_generator import CognitiveLoadAwareGenerator
+from agent.cognitive_code_agent import CognitiveDrivenCodeGenAgent
+from tests.test_cognitive_agent_fixed import MockStructuredLLM
+
+
+@pytest.fixture(scope="module")
+def mock_llm():
+    """整个模块共享一个模拟LLM"""
+    return MockStructuredLLM()
+
+
+@pytest.mark.parametrize("name, factory", [
+    ("line_explainer", lambda llm: CognitiveLineExplainer(llm)),
+    ("effectiveness_validator", lambda llm: LineEffectivenessValidator()),
+])
+def test_imports(mock_llm, name, factory):
+    """测试认知组件可以正常导入和创建"""
+    assert factory(mock_llm) is not None, name
+    assert CognitiveDrivenCodeGenAgent is not None
+
+
+def test_basic_functionality():
+    """测试认知模型、决策追踪和负荷感知生成器的基本功能"""
+    state = CognitiveState(
+        stage=ThinkingStage.PROBLEM_COMPREHENSION,
+        confidence=0.8,
+        mental_effort=0.6,
+        working_memory_load=0.4,
+        focused_concepts=["二分查找", "递归"],
+        discovered_insights=["分治策略有效"],
+        pending_questions=["边界条件如何处理"]
+    )
+    model = CognitiveModel(current_state=state)
+    assert model.current_state.stage == ThinkingStage.PROBLEM_COMPREHENSION
+
+    tracker = CognitiveDecisionTracker("test_session", "测试问题")
+    decision_id = tracker.record_decision(
+        stage="test",
+        decision_type=DecisionType.STRATEGY_SELECTION,
+        decision="测试决策",
+        reasoning="测试推理",
+        confidence=0.8
+    )
+    assert decision_id
+
+    generator = CognitiveLoadAwareGenerator()
+    adaptations, config = generator.assess_and_adapt(
+        "def test(): pass",
+        {"test": True}
+    )
+    assert config is not None
+
+
+def test_line_effectiveness_validation():
+    """测试行有效性验证（包含冗余行的代码）"""
+    validator = LineEffectivenessValidator()
+
+    test_code = '''def test():
+    x = 1
+    x = 1  # 冗余
+    y = 2
+    return y'''
+
+    report = validator.analyze_code(test_code)
+
+    assert report.essential_lines > 0
+    assert 0.0 <= report.effectiveness_score <= 1.0
+
+
+def test_line_effectiveness_reports_are_independent():
+    """测试重复分析相同代码得到一致且互不影响的报告"""
+    validator = LineEffectivenessValidator()
+    code = "def f(a):\n    b = a + 1\n    return b"
+
+    first = validator.analyze_code(code)
+    first.analysis[0].dependents.add(99)
+    second = validator.analyze_code(code)
+
+    assert 99 not in second.analysis[0].dependents
+    assert first.effectiveness_score == second.effectiveness_score
+
+
+def test_line_effectiveness_uses_instance_overrides():
+    """测试重复分析同样的代码时，实例上覆盖的逐行分析方法仍会生效"""
+    code = "def f(a):\n    b = a + 1\n    return b"
+    LineEffectivenessValidator().analyze_code(code)
+
+    validator = LineEffectivenessValidator()
+    with patch.object(validator, "_find_variable_definitions", return_value={}) as find:
+        validator.analyze_code(code)
+
+    find.assert_called_once()
+
+
+def test_suggest_optimizations_cached_per_report_content():
+    """测试相同内容的报告复用缓存的优化建议"""
+    LineEffectivenessValidator.clear_cache()
+    validator = LineEffectivenessValidator()
+    code = "def f(a):\n    unused = 1\n    return a"
+
+    first = validator.suggest_optimizations(validator.analyze_code(code))
+    second = validator.suggest_optimizations(validator.analyze_code(code))
+
+    assert first == second
+    assert first is not second
+    assert any(s.startswith("[REMOVE]") for s in first)
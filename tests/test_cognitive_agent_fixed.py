@@ -11,14 +11,11 @@
 7. 反思阶段
 """
 
-import sys
-import os
+import asyncio
+import functools
 import unittest
 from unittest.mock import Mock, patch
 
-# 添加项目根目录到Python路径
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 from cognitive.cognitive_agent import CognitiveCodeGenAgent, CognitiveCodeGenRequest
 from cognitive.llm_schemas import (
     ProblemComprehension, SolutionPlan, AlgorithmDesign,
@@ -27,6 +24,7 @@ from cognitive.llm_schemas import (
     SolutionStrategy, AlgorithmComponent, ReflectionInsight
 )
 from llm.structured_llm import StructuredLLM
+from pydantic import ValidationError
 
 
 class MockStructuredLLM:
@@ -34,60 +32,86 @@ class MockStructuredLLM:
 
     def generate_structured(self, prompt, output_schema, **kwargs):
         """模拟结构化生成"""
+        try:
+            return self._build_responses()[output_schema]
+        except KeyError:
+            raise ValueError(f"Unsupported output schema: {output_schema}") from None
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _build_responses(cls):
+        """schema类型 -> 响应，只构建一次
+
+        响应内容是可信的固定数据，用 model_construct 跳过字段校验；
+        测试只读取响应的属性，所有调用共享同一批实例即可。
+        """
+        return {
+            ProblemComprehension: cls._make_problem_comprehension(),
+            SolutionPlan: cls._make_solution_plan(),
+            AlgorithmDesign: cls._make_algorithm_design(),
+            CodeImplementation: cls._make_code_implementation(),
+            ValidationResult: cls._make_validation_result(),
+            OptimizationResult: cls._make_optimization_result(),
+            SolutionReflection: cls._make_solution_reflection(),
+        }
+
+    @staticmethod
+    def _make_problem_comprehension():
+        return ProblemComprehension.model_construct(
+            main_goal="实现一个简单的数学计算函数",
+            key_components=[ComponentType.INPUT_PROCESSING, ComponentType.CORE_LOGIC],
+            complexity_assessment=ProblemComplexity.SIMPLE,
+            input_requirements=["数字参数"],
+            output_requirements=["计算结果"],
+            constraints=["无特殊约束"],
+            edge_cases=["零值输入", "负数输入"],
+            initial_thoughts=["需要验证输入", "执行计算", "返回结果"],
+            domain_knowledge_needed=["基础数学", "Python语法"]
+        )
+
+    @staticmethod
+    def _make_solution_plan():
+        return SolutionPlan.model_construct(
+            chosen_strategy=SolutionStrategy.TOP_DOWN,
+            strategy_rationale="问题简单，自顶向下分解最适合",
+            main_steps=["定义函数", "验证输入", "执行计算", "返回结果"],
+            step_dependencies={"验证输入": ["定义函数"]},
+            considerations=["输入验证", "错误处理"],
+            potential_challenges=["边界情况处理"],
+            alternative_approaches=["递归方法", "迭代方法"],
+            estimated_difficulty=ProblemComplexity.SIMPLE
+        )
+
+    @staticmethod
+    def _make_algorithm_design():
+        return AlgorithmDesign.model_construct(
+            algorithm_name="simple_calculator",
+            algorithm_description="一个简单的数学计算器函数",
+            pseudocode=["1. 检查输入有效性", "2. 执行数学运算", "3. 返回结果"],
+            data_structures=["变量", "参数"],
+            components=[
+                AlgorithmComponent.model_construct(
+                    name="input_validator",
+                    purpose="验证输入",
+                    input_type="Any",
+                    output_type="bool",
+                    complexity="O(1)"
+                )
+            ],
+            time_complexity="O(1)",
+            space_complexity="O(1)",
+            invariants=["输入参数有效"],
+            edge_cases_handling=["处理无效输入", "处理边界值"],
+            optimization_opportunities=["无需优化"]
+        )
 
-        if output_schema == ProblemComprehension:
-            return ProblemComprehension(
-                main_goal="实现一个简单的数学计算函数",
-                key_components=[ComponentType.INPUT_PROCESSING, ComponentType.CORE_LOGIC],
-                complexity_assessment=ProblemComplexity.SIMPLE,
-                input_requirements=["数字参数"],
-                output_requirements=["计算结果"],
-                constraints=["无特殊约束"],
-                edge_cases=["零值输入", "负数输入"],
-                initial_thoughts=["需要验证输入", "执行计算", "返回结果"],
-                domain_knowledge_needed=["基础数学", "Python语法"]
-            )
-
-        elif output_schema == SolutionPlan:
-            return SolutionPlan(
-                chosen_strategy=SolutionStrategy.TOP_DOWN,
-                strategy_rationale="问题简单，自顶向下分解最适合",
-                main_steps=["定义函数", "验证输入", "执行计算", "返回结果"],
-                step_dependencies={"验证输入": ["定义函数"]},
-                considerations=["输入验证", "错误处理"],
-                potential_challenges=["边界情况处理"],
-                alternative_approaches=["递归方法", "迭代方法"],
-                estimated_difficulty=ProblemComplexity.SIMPLE
-            )
-
-        elif output_schema == AlgorithmDesign:
-            return AlgorithmDesign(
-                algorithm_name="simple_calculator",
-                algorithm_description="一个简单的数学计算器函数",
-                pseudocode=["1. 检查输入有效性", "2. 执行数学运算", "3. 返回结果"],
-                data_structures=["变量", "参数"],
-                components=[
-                    AlgorithmComponent(
-                        name="input_validator",
-                        purpose="验证输入",
-                        input_type="Any",
-                        output_type="bool",
-                        complexity="O(1)"
-                    )
-                ],
-                time_complexity="O(1)",
-                space_complexity="O(1)",
-                invariants=["输入参数有效"],
-                edge_cases_handling=["处理无效输入", "处理边界值"],
-                optimization_opportunities=["无需优化"]
-            )
-
-        elif output_schema == CodeImplementation:
-            return CodeImplementation(
-                function_name="simple_calculator",
-                function_signature="def simple_calculator(a, b, operation='add')",
-                docstring="简单的数学计算器，支持基本运算",
-                implementation_code="""def simple_calculator(a, b, operation='add'):
+    @staticmethod
+    def _make_code_implementation():
+        return CodeImplementation.model_construct(
+            function_name="simple_calculator",
+            function_signature="def simple_calculator(a, b, operation='add')",
+            docstring="简单的数学计算器，支持基本运算",
+            implementation_code="""def simple_calculator(a, b, operation='add'):
     \"\"\"
     简单的数学计算器，支持基本运算
 
@@ -114,63 +138,64 @@ class MockStructuredLLM:
         return a / b
     else:
         raise ValueError("不支持的运算类型")""",
-                helper_functions=[],
-                import_statements=[],
-                implementation_notes=["包含基本的输入验证", "支持四种基本运算"],
-                code_rationale="采用简单直接的实现方式，易于理解和维护"
-            )
-
-        elif output_schema == ValidationResult:
-            return ValidationResult(
-                syntax_valid=True,
-                logic_valid=True,
-                test_cases_passed=4,
-                total_test_cases=4,
-                identified_issues=[],
-                suggestions=["可以添加更多运算类型", "考虑支持复数运算"],
-                needs_optimization=False,
-                confidence_score=0.9
-            )
-
-        elif output_schema == OptimizationResult:
-            return OptimizationResult(
-                optimized_code="# 无需优化的代码",
-                optimization_techniques=["代码已经足够简洁"],
-                performance_improvements=["性能良好"],
-                trade_offs=["简洁性与扩展性的平衡"],
-                optimization_rationale="当前代码已经足够优化"
-            )
-
-        elif output_schema == SolutionReflection:
-            return SolutionReflection(
-                quality_assessment="良好",
-                strengths=["代码清晰", "错误处理完善", "易于使用"],
-                weaknesses=["功能相对简单", "可扩展性有限"],
-                alternative_approaches=["面向对象设计", "函数式编程风格"],
-                lessons_learned=["简单直接的方法往往最有效", "输入验证很重要"],
-                future_improvements=["添加更多运算类型", "支持表达式解析"],
-                insights=[
-                    ReflectionInsight(
-                        insight_type="设计模式",
-                        description="简单函数设计适合基础功能",
-                        impact="正面影响，提高可读性",
-                        confidence=0.8
-                    )
-                ],
-                overall_satisfaction=0.8
-            )
-
-        else:
-            raise ValueError(f"Unsupported output schema: {output_schema}")
-
-
-class TestCognitiveAgentFixed(unittest.TestCase):
+            helper_functions=[],
+            import_statements=[],
+            implementation_notes=["包含基本的输入验证", "支持四种基本运算"],
+            code_rationale="采用简单直接的实现方式，易于理解和维护"
+        )
+
+    @staticmethod
+    def _make_validation_result():
+        return ValidationResult.model_construct(
+            syntax_valid=True,
+            logic_valid=True,
+            test_cases_passed=4,
+            total_test_cases=4,
+            identified_issues=[],
+            suggestions=["可以添加更多运算类型", "考虑支持复数运算"],
+            needs_optimization=False,
+            confidence_score=0.9
+        )
+
+    @staticmethod
+    def _make_optimization_result():
+        return OptimizationResult.model_construct(
+            optimized_code="# 无需优化的代码",
+            optimization_techniques=["代码已经足够简洁"],
+            performance_improvements=["性能良好"],
+            trade_offs=["简洁性与扩展性的平衡"],
+            optimization_rationale="当前代码已经足够优化"
+        )
+
+    @staticmethod
+    def _make_solution_reflection():
+        return SolutionReflection.model_construct(
+            quality_assessment="良好",
+            strengths=["代码清晰", "错误处理完善", "易于使用"],
+            weaknesses=["功能相对简单", "可扩展性有限"],
+            alternative_approaches=["面向对象设计", "函数式编程风格"],
+            lessons_learned=["简单直接的方法往往最有效", "输入验证很重要"],
+            future_improvements=["添加更多运算类型", "支持表达式解析"],
+            insights=[
+                ReflectionInsight.model_construct(
+                    insight_type="设计模式",
+                    description="简单函数设计适合基础功能",
+                    impact="正面影响，提高可读性",
+                    confidence=0.8
+                )
+            ],
+            overall_satisfaction=0.8
+        )
+
+
+class TestCognitiveAgentFixed(unittest.IsolatedAsyncioTestCase):
     """测试修复后的认知代理"""
 
-    def setUp(self):
-        """设置测试环境"""
-        self.mock_llm = MockStructuredLLM()
-        self.agent = CognitiveCodeGenAgent(self.mock_llm)
+    @classmethod
+    def setUpClass(cls):
+        """设置测试环境（模拟LLM无状态，整个类共享一个代理）"""
+        cls.mock_llm = MockStructuredLLM()
+        cls.agent = CognitiveCodeGenAgent(cls.mock_llm)
 
     def test_agent_initialization(self):
         """测试代理初始化"""
@@ -179,6 +204,21 @@ class TestCognitiveAgentFixed(unittest.TestCase):
         self.assertIsNotNone(self.agent.thinking_process)
         self.assertIsNotNone(self.agent.cognitive_model)
 
+    def test_shared_responses_are_frozen(self):
+        """测试共享的模拟响应不可修改"""
+        response = self.mock_llm.generate_structured("", SolutionReflection)
+
+        with self.assertRaises(ValidationError):
+            response.overall_satisfaction = 0.1
+        with self.assertRaises(ValidationError):
+            response.insights[0].confidence = 0.1
+
+    def test_mock_responses_match_schemas(self):
+        """测试跳过校验构建的模拟响应仍然符合各自的schema"""
+        for schema, response in MockStructuredLLM._build_responses().items():
+            with self.subTest(schema=schema.__name__):
+                schema.model_validate(response.model_dump())
+
     def test_problem_comprehension_with_llm(self):
         """测试问题理解阶段的LLM集成"""
         request = CognitiveCodeGenRequest(
@@ -297,6 +337,52 @@ class TestCognitiveAgentFixed(unittest.TestCase):
         print(f"置信度: {result.confidence}")
         print(f"认知复杂度: {result.cognitive_load}")
 
+    async def test_full_generation_workflow_async(self):
+        """测试异步工作流与同步工作流产出一致的代码"""
+        request = CognitiveCodeGenRequest(
+            requirement="写一个计算两个数字相加的函数",
+            difficulty="simple"
+        )
+
+        result = await self.agent.agenerate_code(request)
+        expected = CognitiveCodeGenAgent(self.mock_llm).generate_code(request)
+
+        self.assertEqual(result.generated_code, expected.generated_code)
+        self.assertEqual(result.line_explanations, expected.line_explanations)
+        self.assertEqual(result.confidence, expected.confidence)
+        stages = [stage["stage"] for stage in result.cognitive_trace["stages"]]
+        self.assertIn("reflection", stages)
+
+    def test_comprehend_and_plan_merged_call(self):
+        """测试支持组合输出时，理解与规划合并为一次LLM调用"""
+
+        class MultiMockLLM(MockStructuredLLM):
+            def __init__(self):
+                super().__init__()
+                self.calls = []
+
+            def generate_structured(self, prompt, output_schema, **kwargs):
+                self.calls.append(output_schema)
+                return super().generate_structured(prompt, output_schema, **kwargs)
+
+            def generate_structured_multi(self, prompt, output_schemas, **kwargs):
+                self.calls.append(tuple(output_schemas))
+                base = MockStructuredLLM()
+                return {
+                    "problem_comprehension": base.generate_structured(prompt, ProblemComprehension),
+                    "solution_plan": base.generate_structured(prompt, SolutionPlan),
+                }
+
+        llm = MultiMockLLM()
+        agent = CognitiveCodeGenAgent(llm)
+        request = CognitiveCodeGenRequest(requirement="写一个计算两个数字和的函数")
+
+        understanding, plan = agent._comprehend_and_plan(request)
+
+        self.assertEqual(llm.calls, [(ProblemComprehension, SolutionPlan)])
+        self.assertEqual(understanding["main_goal"], "实现一个简单的数学计算函数")
+        self.assertEqual(plan["strategy"], "top_down")
+
 
 def test_fallback_behavior():
     """测试LLM调用失败时的降级行为"""
@@ -324,6 +410,42 @@ def test_fallback_behavior():
     print("LLM 失败降级行为测试通过")
 
 
+def test_fallback_behavior_async():
+    """测试异步工作流在LLM调用失败时同样走降级逻辑"""
+
+    class FailingLLM:
+        def generate_structured(self, *args, **kwargs):
+            raise RuntimeError("LLM 服务不可用")
+
+    agent = CognitiveCodeGenAgent(FailingLLM())
+    request = CognitiveCodeGenRequest(requirement="写一个简单函数", difficulty="simple")
+
+    result = asyncio.run(agent.agenerate_code(request))
+
+    assert result.generated_code is not None
+    assert result.confidence > 0
+    fallback_stages = {d["stage"] for d in result.cognitive_trace["decisions"] if "fallback" in d}
+    assert "reflection" in fallback_stages
+
+
+def test_async_trace_matches_sync_order():
+    """测试异步工作流记录的认知阶段顺序与同步工作流一致（反思在分析之前完成）"""
+
+    class FailingLLM:
+        def generate_structured(self, *args, **kwargs):
+            raise RuntimeError("LLM 服务不可用")
+
+    request = CognitiveCodeGenRequest(requirement="写一个简单函数", difficulty="simple")
+
+    sync_result = CognitiveCodeGenAgent(FailingLLM()).generate_code(request)
+    async_result = asyncio.run(CognitiveCodeGenAgent(FailingLLM()).agenerate_code(request))
+
+    def stage_order(result):
+        return [stage["stage"] for stage in result.cognitive_trace["stages"]]
+
+    assert stage_order(async_result) == stage_order(sync_result)
+
+
 if __name__ == "__main__":
     print("开始测试修复后的认知代理功能...")
     print("=" * 50)
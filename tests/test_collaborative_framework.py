@@ -4,11 +4,14 @@
 测试各个组件的集成和基本功能
 """
 
+import asyncio
+import dataclasses
+import random
 import sys
-import os
+import threading
+import time
 import unittest
 from unittest.mock import Mock, patch
-sys.path.append('.')
 
 # 导入协作框架组件
 from tools.collaborative_framework import (
@@ -18,13 +21,22 @@ from tools.collaborative_framework import (
     DAGWorkflow,
     create_default_workflow,
     QualityMetrics,
+    overall_scores,
     StageOutput,
-    FusionResult
+    FusionResult,
+    StageOutputSchema,
+    clear_llm_cache,
+    _SHARED_LLM_CACHE_SIZE,
+    _shared_llms,
+    _shared_worker_llm
 )
+from tools.worker_agent import WorkerAgent, WorkerConfig
+from llm.structured_llm import StructuredLLM
 from tools.collaborative_generator import (
     create_collaborative_generator,
     create_default_team_config,
-    CollaborativeSession
+    CollaborativeSession,
+    quick_generate
 )
 
 
@@ -36,6 +48,10 @@ class TestCollaborativeFramework(unittest.TestCase):
         self.mock_llm = Mock()
         self.mock_llm.generate_structured = Mock()
 
+        # 测试中会patch StructuredLLM，避免共享的Worker LLM在测试间泄漏
+        clear_llm_cache()
+        self.addCleanup(clear_llm_cache)
+
     def test_dag_workflow_creation(self):
         """测试DAG工作流创建"""
         workflow = create_default_workflow()
@@ -81,6 +97,17 @@ class TestCollaborativeFramework(unittest.TestCase):
         self.assertGreater(overall_score, 0)
         self.assertLessEqual(overall_score, 100)
 
+    def test_quality_metrics_batch(self):
+        """测试批量综合得分与逐个计算一致"""
+        metrics = [
+            QualityMetrics(correctness=90.0, efficiency=85.0, security=75.0),
+            QualityMetrics(creativity=80.0, completeness=88.0, maintainability=82.0),
+            QualityMetrics()
+        ]
+
+        self.assertEqual(overall_scores(metrics), [m.overall_score for m in metrics])
+        self.assertEqual(overall_scores([]), [])
+
     def test_stage_output_creation(self):
         """测试阶段输出创建"""
         metrics = QualityMetrics(
@@ -110,6 +137,8 @@ class TestCollaborativeFramework(unittest.TestCase):
         self.assertIn('stage', output_dict)
         self.assertIn('content', output_dict)
         self.assertIn('quality_metrics', output_dict)
+        self.assertEqual(output_dict['quality_metrics'], metrics.to_dict())
+        self.assertEqual(output_dict['quality_metrics']['overall_score'], metrics.overall_score)
 
     def test_fusion_result_creation(self):
         """测试融合结果创建"""
@@ -175,11 +204,57 @@ class TestCollaborativeFramework(unittest.TestCase):
 
         workflow.mark_completed(CognitiveStage.REQUIREMENT_ANALYSIS, mock_result)
 
+        self.assertEqual(
+            workflow._completed_mask,
+            workflow._bit[CognitiveStage.REQUIREMENT_ANALYSIS]
+        )
+        self.assertEqual(
+            set(workflow.get_ready_stages()),
+            {CognitiveStage.ARCHITECTURE_DESIGN, CognitiveStage.ALGORITHM_SELECTION}
+        )
+
         # 进度应该大于0
         progress = workflow.get_progress()
         self.assertGreater(progress, 0.0)
         self.assertLessEqual(progress, 1.0)
 
+    def test_stage_context_cache_invalidation(self):
+        """测试阶段上下文被缓存，并在依赖阶段完成或重置后更新"""
+        workflow = create_default_workflow()
+        stage = CognitiveStage.ARCHITECTURE_DESIGN
+
+        empty = workflow.get_context_for_stage(stage)
+        self.assertEqual(empty, {})
+        self.assertIs(workflow.get_context_for_stage(stage), empty)
+
+        workflow.mark_completed(
+            CognitiveStage.REQUIREMENT_ANALYSIS,
+            _mock_result(CognitiveStage.REQUIREMENT_ANALYSIS)
+        )
+        context = workflow.get_context_for_stage(stage)
+        self.assertEqual(
+            context["requirement_analysis_result"],
+            "Mock content for requirement_analysis"
+        )
+        self.assertEqual(
+            context["requirement_analysis_quality"],
+            _MOCK_RESULT.quality_metrics.overall_score
+        )
+
+        workflow.reset()
+        self.assertEqual(workflow.get_context_for_stage(stage), {})
+
+    def test_default_workflows_are_independent(self):
+        """测试每次创建的默认工作流互不影响"""
+        first = create_default_workflow()
+        second = create_default_workflow()
+
+        first.nodes[CognitiveStage.REQUIREMENT_ANALYSIS].completed = True
+
+        self.assertFalse(second.nodes[CognitiveStage.REQUIREMENT_ANALYSIS].completed)
+        self.assertEqual(second.get_progress(), 0.0)
+        self.assertEqual(first.get_execution_order(), second.get_execution_order())
+
     def test_factory_functions(self):
         """测试工厂函数"""
         # 测试默认团队配置创建
@@ -190,6 +265,11 @@ class TestCollaborativeFramework(unittest.TestCase):
             self.assertIn('model', config)
             self.assertIn('specialization', config)
 
+        # 相同环境下复用同一组只读配置
+        self.assertIs(create_default_team_config(), team_config)
+        with self.assertRaises(TypeError):
+            team_config[0]['model'] = 'other-model'
+
     def test_collaborative_session(self):
         """测试协作会话管理"""
         # 创建模拟生成器
@@ -215,9 +295,82 @@ class TestCollaborativeFramework(unittest.TestCase):
         self.assertEqual(summary['successful_requests'], 1)
 
 
+    def test_collaborative_session_batch(self):
+        """测试批量生成按顺序返回结果并记录会话历史"""
+        mock_generator = Mock()
+        mock_generator.generate_code.side_effect = lambda requirement, context: {
+            'success': True,
+            'final_code': f'# {requirement}',
+            'execution_time': 1.0
+        }
+        requirements = ["first requirement", "second requirement", "third requirement"]
+
+        session = CollaborativeSession(mock_generator)
+        results = session.run_batch(requirements)
+        async_results = asyncio.run(session.run_batch_async(requirements))
+
+        self.assertEqual([r['final_code'] for r in results], [f'# {r}' for r in requirements])
+        self.assertEqual(async_results, results)
+        self.assertEqual(len(session.session_history), 2 * len(requirements))
+
+    def test_collaborative_session_closes_generator(self):
+        """测试会话作为上下文管理器退出时关闭生成器"""
+        generator = CollaborativeCodeGenerator(master_llm=Mock(), worker_configs=[])
+
+        with CollaborativeSession(generator) as session:
+            self.assertIs(session.generator, generator)
+
+        with self.assertRaises(RuntimeError):
+            generator._executor.submit(lambda: None)
+
+    def test_quick_generate_closes_generator(self):
+        """测试快速生成结束后关闭生成器"""
+        generator = Mock()
+        generator.__enter__ = Mock(return_value=generator)
+        generator.__exit__ = Mock(return_value=None)
+        generator.generate_code.return_value = {'success': True}
+
+        with patch('tools.collaborative_generator.create_collaborative_generator',
+                   return_value=generator):
+            result = quick_generate("test requirement", model_config={'api_key': 'k'})
+
+        self.assertTrue(result['success'])
+        generator.__exit__.assert_called_once()
+
+
+# 模拟阶段结果的原型，各阶段只替换 stage 和 fused_content
+_MOCK_RESULT = FusionResult(
+    stage=CognitiveStage.REQUIREMENT_ANALYSIS,
+    fused_content="",
+    fusion_strategy=FusionStrategy.BEST_SINGLE,
+    source_workers=["mock_worker"],
+    confidence=0.8,
+    quality_metrics=QualityMetrics(
+        creativity=80.0,
+        correctness=85.0,
+        efficiency=82.0,
+        completeness=88.0,
+        maintainability=79.0,
+        security=84.0
+    )
+)
+
+
+def _mock_result(stage: CognitiveStage) -> FusionResult:
+    """基于原型生成指定阶段的模拟结果"""
+    return dataclasses.replace(
+        _MOCK_RESULT, stage=stage, fused_content=f"Mock content for {stage.value}"
+    )
+
+
 class TestMockCollaboration(unittest.TestCase):
     """测试模拟协作功能"""
 
+    def setUp(self):
+        """清空共享的Worker LLM，避免patch产生的实例在测试间泄漏"""
+        clear_llm_cache()
+        self.addCleanup(clear_llm_cache)
+
     def test_mock_workflow_execution(self):
         """测试模拟工作流执行"""
         # 这个测试演示了如何在没有真实API的情况下测试协作逻辑
@@ -230,60 +383,507 @@ class TestMockCollaboration(unittest.TestCase):
         stages = [CognitiveStage.REQUIREMENT_ANALYSIS, CognitiveStage.CORE_IMPLEMENTATION]
 
         for stage in stages:
-            mock_result = FusionResult(
-                stage=stage,
-                fused_content=f"Mock content for {stage.value}",
-                fusion_strategy=FusionStrategy.BEST_SINGLE,
-                source_workers=["mock_worker"],
-                confidence=0.8,
-                quality_metrics=QualityMetrics(
-                    creativity=80.0,
-                    correctness=85.0,
-                    efficiency=82.0,
-                    completeness=88.0,
-                    maintainability=79.0,
-                    security=84.0
-                )
-            )
-            workflow.mark_completed(stage, mock_result)
+            workflow.mark_completed(stage, _mock_result(stage))
 
         # 验证所有阶段都完成了
         self.assertTrue(workflow.is_completed())
         self.assertEqual(workflow.get_progress(), 1.0)
+        self.assertEqual(create_default_workflow().get_progress(), 0.0)
 
+    def test_execution_waves(self):
+        """测试按依赖层级分组，互不依赖的阶段位于同一层"""
+        waves = create_default_workflow().get_execution_waves()
 
-def run_tests():
-    """运行所有测试"""
-    print("运行协作框架测试...")
+        self.assertEqual(waves[0], [CognitiveStage.REQUIREMENT_ANALYSIS])
+        self.assertEqual(
+            set(waves[1]),
+            {CognitiveStage.ARCHITECTURE_DESIGN, CognitiveStage.ALGORITHM_SELECTION}
+        )
+        self.assertEqual(waves[-1], [CognitiveStage.INTEGRATION])
+        self.assertEqual(sum(len(wave) for wave in waves), 9)
 
-    # 创建测试套件
-    loader = unittest.TestLoader()
-    test_suite = unittest.TestSuite()
+    def test_execution_order_resorts_and_detects_cycles(self):
+        """测试添加阶段后重新排序，以及循环依赖检测"""
+        workflow = DAGWorkflow()
+        workflow.add_stage(CognitiveStage.REQUIREMENT_ANALYSIS, [])
+        self.assertEqual(workflow.get_execution_order(), [CognitiveStage.REQUIREMENT_ANALYSIS])
 
-    # 添加测试
-    test_suite.addTests(loader.loadTestsFromTestCase(TestCollaborativeFramework))
-    test_suite.addTests(loader.loadTestsFromTestCase(TestMockCollaboration))
+        workflow.add_stage(CognitiveStage.CORE_IMPLEMENTATION, [CognitiveStage.REQUIREMENT_ANALYSIS])
+        self.assertEqual(
+            workflow.get_execution_order(),
+            [CognitiveStage.REQUIREMENT_ANALYSIS, CognitiveStage.CORE_IMPLEMENTATION]
+        )
 
-    # 运行测试
-    runner = unittest.TextTestRunner(verbosity=2)
-    result = runner.run(test_suite)
+        workflow.add_stage(CognitiveStage.REQUIREMENT_ANALYSIS, [CognitiveStage.CORE_IMPLEMENTATION])
+        with self.assertRaises(ValueError):
+            workflow.get_execution_order()
+
+    def test_execution_order_on_generated_dags(self):
+        """测试随机生成的各种规模DAG都得到合法的拓扑顺序和层级"""
+        rng = random.Random(0)
+        all_stages = list(CognitiveStage)
+
+        for size in (4, 6, len(all_stages)):
+            for trial in range(5):
+                with self.subTest(size=size, trial=trial):
+                    stages = rng.sample(all_stages, size)
+                    workflow = DAGWorkflow()
+                    # 只从排在前面的阶段连边，保证无环；添加顺序再打乱
+                    edges = {
+                        child: [parent for parent in stages[:i] if rng.random() < 0.4]
+                        for i, child in enumerate(stages)
+                    }
+                    for stage in rng.sample(stages, size):
+                        workflow.add_stage(stage, edges[stage])
+
+                    order = workflow.get_execution_order()
+                    self.assertCountEqual(order, stages)
+                    position = {stage: i for i, stage in enumerate(order)}
+                    level = {
+                        stage: i
+                        for i, wave in enumerate(workflow.get_execution_waves())
+                        for stage in wave
+                    }
+                    for child, parents in edges.items():
+                        for parent in parents:
+                            self.assertLess(position[parent], position[child])
+                            self.assertLess(level[parent], level[child])
+
+    def test_parallel_stage_execution(self):
+        """测试并发执行各层阶段，且每个阶段都能拿到前置阶段的结果"""
+        generator = CollaborativeCodeGenerator(
+            master_llm=Mock(),
+            worker_configs=[],
+            parallel_stages=True
+        )
+        self.addCleanup(generator.close)
+        seen_contexts = {}
 
-    # 报告结果
-    if result.wasSuccessful():
-        print("\n所有测试通过!")
-    else:
-        print(f"\n测试失败: {len(result.failures)} 个失败, {len(result.errors)} 个错误")
+        def fake_fuse_stage(stage, stage_outputs, context):
+            seen_contexts[stage] = context
+            return _mock_result(stage)
+
+        with patch.object(generator, '_fuse_stage', side_effect=fake_fuse_stage):
+            result = generator.generate_code("test requirement")
+
+        self.assertTrue(result['success'])
+        self.assertTrue(generator.workflow.is_completed())
+        self.assertIn(
+            "requirement_analysis_result",
+            seen_contexts[CognitiveStage.ALGORITHM_SELECTION]
+        )
+
+    def test_parallel_stages_share_workers_within_concurrency_limit(self):
+        """测试并发阶段共用同一Worker时，总并发不超过上限且Worker统计正确"""
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def generate_structured(**kwargs):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            return StageOutputSchema(
+                content="def solve(): pass", reasoning="mock", confidence=0.8, key_features=["mock"]
+            )
+
+        llm = Mock(generate_structured=Mock(side_effect=generate_structured))
+        workers = [
+            WorkerAgent(llm, WorkerConfig(model_name="mock", specialization=specialization))
+            for specialization in ("algorithm", "architecture")
+        ]
+        workflow = DAGWorkflow()
+        stages = [CognitiveStage.ARCHITECTURE_DESIGN, CognitiveStage.ALGORITHM_SELECTION,
+                  CognitiveStage.INTERFACE_DESIGN]
+        for stage in stages:
+            workflow.add_stage(stage, [])
+
+        generator = CollaborativeCodeGenerator(
+            master_llm=Mock(), worker_configs=[], workflow=workflow,
+            max_concurrent_workers=2, parallel_stages=True
+        )
+        self.addCleanup(generator.close)
+        generator.master_agent = Mock(judge_stage_outputs=Mock(
+            side_effect=lambda stage, outputs, context: _mock_result(stage)
+        ))
+
+        with patch.object(generator, '_select_suitable_workers', return_value=workers):
+            generator.generate_code("test requirement")
+
+        self.assertTrue(workflow.is_completed())
+        self.assertCountEqual(generator.stage_results, stages)
+        self.assertLessEqual(peak[0], 2)
+        self.assertIsNone(generator.current_stage)
+        for worker in workers:
+            self.assertEqual(worker.stats['stages_processed'], len(stages))
+            self.assertEqual(len(worker.stats['processing_times']), len(stages))
+
+    def test_final_result_statistics(self):
+        """测试最终结果中的质量得分和置信度统计"""
+        generator = CollaborativeCodeGenerator(master_llm=Mock(), worker_configs=[])
+        self.addCleanup(generator.close)
+
+        stages = [CognitiveStage.REQUIREMENT_ANALYSIS, CognitiveStage.CORE_IMPLEMENTATION,
+                  CognitiveStage.INTEGRATION]
+        for i, stage in enumerate(stages):
+            generator.stage_results[stage] = dataclasses.replace(
+                _mock_result(stage),
+                confidence=0.5 + 0.1 * i,
+                quality_metrics=QualityMetrics(correctness=60.0 + 15 * i, efficiency=70.0 - 10 * i)
+            )
 
-        for failure in result.failures:
-            print(f"失败: {failure[0]}")
-            print(f"详情: {failure[1]}")
+        result = generator._generate_final_result({'requirement': 'test'}, 1.0)
+        scores = [r.quality_metrics.overall_score for r in generator.stage_results.values()]
 
-        for error in result.errors:
-            print(f"错误: {error[0]}")
-            print(f"详情: {error[1]}")
+        self.assertTrue(result['success'])
+        self.assertAlmostEqual(result['avg_quality_score'], sum(scores) / len(scores))
+        self.assertEqual(result['min_quality_score'], min(scores))
+        self.assertEqual(result['max_quality_score'], max(scores))
+        self.assertAlmostEqual(result['avg_confidence'], 0.6)
+
+    def test_parallel_workers_run_in_shared_pool(self):
+        """测试Worker都在共用线程池执行，失败的Worker被跳过"""
+        generator = CollaborativeCodeGenerator(
+            master_llm=Mock(), worker_configs=[], worker_timeout=None
+        )
+        self.addCleanup(generator.close)
+        stage = CognitiveStage.CORE_IMPLEMENTATION
+        threads = {}
+
+        def make_worker(worker_id, fail=False):
+            worker = Mock(worker_id=worker_id)
+
+            def process_stage(stage, context, previous_results):
+                threads[worker_id] = threading.current_thread()
+                if fail:
+                    raise RuntimeError("boom")
+                return f"{worker_id}_output"
+
+            worker.process_stage.side_effect = process_stage
+            return worker
+
+        workers = [make_worker("w1"), make_worker("w2", fail=True), make_worker("w3")]
+        outputs = generator._execute_workers_parallel(workers, stage, {}, {})
+
+        self.assertCountEqual(outputs, ["w1_output", "w3_output"])
+
+        single = generator._execute_workers_parallel([make_worker("solo")], stage, {}, {})
+        self.assertEqual(single, ["solo_output"])
+        for thread in threads.values():
+            self.assertTrue(thread.name.startswith("ccg-worker"))
+
+    def test_slow_worker_does_not_block_caller(self):
+        """测试慢Worker（包括只有一个Worker时）不会让调用方等待超过超时"""
+        generator = CollaborativeCodeGenerator(
+            master_llm=Mock(), worker_configs=[], worker_timeout=0.05
+        )
+        self.addCleanup(generator.close)
+        release = threading.Event()
+        self.addCleanup(release.set)
+        threads = []
+
+        def slow_stage(stage, context, previous_results):
+            threads.append(threading.current_thread())
+            release.wait(5)
+            return "slow_output"
+
+        for workers in (
+            [Mock(worker_id="slow", process_stage=Mock(side_effect=slow_stage))],
+            [Mock(worker_id="fast", process_stage=Mock(return_value="fast_output")),
+             Mock(worker_id="slow", process_stage=Mock(side_effect=slow_stage))],
+        ):
+            with self.subTest(workers=len(workers)):
+                start = time.monotonic()
+                with self.assertLogs('tools.collaborative_framework', level='WARNING'):
+                    outputs = generator._execute_workers_parallel(
+                        workers, CognitiveStage.CORE_IMPLEMENTATION, {}, {}
+                    )
+
+                self.assertLess(time.monotonic() - start, 2)
+                self.assertNotIn("slow_output", outputs)
+                self.assertIsNot(threads[-1], threading.current_thread())
+
+    def test_workers_beyond_limit_run_with_bounded_concurrency(self):
+        """测试Worker数超过并发上限时全部执行，且同时运行的Worker不超过上限"""
+        generator = CollaborativeCodeGenerator(
+            master_llm=Mock(), worker_configs=[], max_concurrent_workers=2
+        )
+        self.addCleanup(generator.close)
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def make_worker(worker_id):
+            def process_stage(stage, context, previous_results):
+                with lock:
+                    running[0] += 1
+                    peak[0] = max(peak[0], running[0])
+                time.sleep(0.01)
+                with lock:
+                    running[0] -= 1
+                return f"{worker_id}_output"
+
+            return Mock(worker_id=worker_id, process_stage=Mock(side_effect=process_stage))
+
+        workers = [make_worker(f"w{i}") for i in range(5)]
+        outputs = generator._execute_workers_parallel(
+            workers, CognitiveStage.CORE_IMPLEMENTATION, {}, {}
+        )
+
+        self.assertCountEqual(outputs, [f"w{i}_output" for i in range(5)])
+        self.assertLessEqual(peak[0], 2)
+
+    def test_worker_timeout_excludes_queue_time(self):
+        """测试Worker数超过线程数时，排队时间不计入各Worker的超时"""
+        generator = CollaborativeCodeGenerator(
+            master_llm=Mock(), worker_configs=[], max_concurrent_workers=1, worker_timeout=0.3
+        )
+        self.addCleanup(generator.close)
+
+        def make_worker(worker_id):
+            def process_stage(stage, context, previous_results):
+                time.sleep(0.15)
+                return f"{worker_id}_output"
+
+            return Mock(worker_id=worker_id, process_stage=Mock(side_effect=process_stage))
+
+        start = time.monotonic()
+        outputs = generator._execute_workers_parallel(
+            [make_worker(f"w{i}") for i in range(3)], CognitiveStage.CORE_IMPLEMENTATION, {}, {}
+        )
+
+        # 总耗时超过单个Worker的超时，但每个Worker自身都没有超时
+        self.assertGreater(time.monotonic() - start, 0.3)
+        self.assertCountEqual(outputs, [f"w{i}_output" for i in range(3)])
+
+    def test_slow_worker_timeout_keeps_finished_outputs(self):
+        """测试超时的Worker被放弃，已完成Worker的输出保留"""
+        generator = CollaborativeCodeGenerator(
+            master_llm=Mock(), worker_configs=[], worker_timeout=0.05
+        )
+        self.addCleanup(generator.close)
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def slow_stage(stage, context, previous_results):
+            release.wait(5)
+            return "slow_output"
+
+        workers = [
+            Mock(worker_id="slow", process_stage=Mock(side_effect=slow_stage)),
+            Mock(worker_id="fast1", process_stage=Mock(return_value="fast1_output")),
+            Mock(worker_id="fast2", process_stage=Mock(return_value="fast2_output"))
+        ]
+
+        with self.assertLogs('tools.collaborative_framework', level='WARNING') as logs:
+            outputs = generator._execute_workers_parallel(
+                workers, CognitiveStage.CORE_IMPLEMENTATION, {}, {}
+            )
+
+        self.assertCountEqual(outputs, ["fast1_output", "fast2_output"])
+        self.assertTrue(any("slow" in message for message in logs.output))
+
+    def test_hung_worker_does_not_block_queued_workers(self):
+        """测试超时仍在运行的Worker不占用线程池，排队的Worker和后续阶段照常执行"""
+        generator = CollaborativeCodeGenerator(
+            master_llm=Mock(), worker_configs=[], max_concurrent_workers=1, worker_timeout=0.1
+        )
+        self.addCleanup(generator.close)
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def hung_stage(stage, context, previous_results):
+            release.wait(5)
+            return "hung_output"
+
+        workers = [
+            Mock(worker_id="hung", process_stage=Mock(side_effect=hung_stage)),
+            Mock(worker_id="queued", process_stage=Mock(return_value="queued_output"))
+        ]
+
+        start = time.monotonic()
+        with self.assertLogs('tools.collaborative_framework', level='INFO') as logs:
+            outputs = generator._execute_workers_parallel(
+                workers, CognitiveStage.CORE_IMPLEMENTATION, {}, {}
+            )
+        next_stage = generator._execute_workers_parallel(
+            [Mock(worker_id="next", process_stage=Mock(return_value="next_output"))],
+            CognitiveStage.TESTING_STRATEGY, {}, {}
+        )
 
-    return result.wasSuccessful()
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(outputs, ["queued_output"])
+        self.assertEqual(next_stage, ["next_output"])
+        self.assertTrue(any("hung" in m and "仍在后台运行" in m for m in logs.output))
+        self.assertTrue(any("queued" in m and "尚未开始" in m for m in logs.output))
+        self.assertEqual(generator.get_progress()['abandoned_workers_running'], 1)
+
+        release.set()
+        for future in list(generator._abandoned_futures):
+            future.result(timeout=5)
+        self.assertEqual(generator.get_progress()['abandoned_workers_running'], 0)
+
+    def test_suitable_workers_follow_membership_changes(self):
+        """测试按阶段缓存的Worker选择随Worker增减更新"""
+        with patch('tools.collaborative_framework.StructuredLLM'):
+            generator = CollaborativeCodeGenerator(
+                master_llm=Mock(),
+                worker_configs=[{'specialization': 'algorithm'}, {'specialization': 'security'}]
+            )
+            self.addCleanup(generator.close)
+
+            stage = CognitiveStage.ALGORITHM_SELECTION
+            selected = generator._select_suitable_workers(stage)
+            self.assertEqual([w.config.specialization for w in selected], ['algorithm'])
+
+            self.assertTrue(generator.add_worker({'specialization': 'general'}))
+            selected = generator._select_suitable_workers(stage)
+            self.assertEqual([w.config.specialization for w in selected], ['algorithm', 'general'])
+
+        algorithm_worker = selected[0]
+        self.assertTrue(generator.remove_worker(algorithm_worker.worker_id))
+        self.assertNotIn(algorithm_worker, generator._select_suitable_workers(stage))
+
+        # 返回的是副本，修改不影响缓存
+        generator._select_suitable_workers(stage).clear()
+        self.assertTrue(generator._select_suitable_workers(stage))
+
+    def test_workers_share_llm_per_endpoint(self):
+        """测试相同模型和端点的Workers共用一个LLM实例"""
+        worker_configs = [
+            {'model': 'test-model', 'specialization': 'algorithm', 'api_key': 'k'},
+            {'model': 'test-model', 'specialization': 'security', 'api_key': 'k'},
+            {'model': 'test-model', 'specialization': 'general', 'api_key': 'k',
+             'base_url': 'http://other'}
+        ]
+
+        with patch('tools.collaborative_framework.StructuredLLM',
+                   side_effect=lambda **kwargs: Mock(**kwargs)) as mock_llm_class:
+            generator = CollaborativeCodeGenerator(
+                master_llm=Mock(),
+                worker_configs=worker_configs
+            )
+            self.addCleanup(generator.close)
+
+        llms = [worker.llm for worker in generator.workers]
+        self.assertIs(llms[0], llms[1])
+        self.assertIsNot(llms[0], llms[2])
+        self.assertEqual(mock_llm_class.call_count, 2)
+
+        # 清空后重新创建实例
+        clear_llm_cache()
+        with patch('tools.collaborative_framework.StructuredLLM',
+                   side_effect=lambda **kwargs: Mock(**kwargs)):
+            self.assertIsNot(_shared_worker_llm('test-model', 'k', None), llms[0])
+
+    def test_shared_llm_cache_is_bounded(self):
+        """测试共用LLM缓存有上限，且不以明文密钥作为键"""
+        with patch('tools.collaborative_framework.StructuredLLM',
+                   side_effect=lambda **kwargs: Mock(**kwargs)):
+            for i in range(_SHARED_LLM_CACHE_SIZE + 5):
+                _shared_worker_llm('test-model', f'secret-{i}', None)
+
+        self.assertEqual(len(_shared_llms), _SHARED_LLM_CACHE_SIZE)
+        self.assertFalse(any('secret' in str(key) for key in _shared_llms))
+
+    def test_shared_llm_stats_are_thread_safe(self):
+        """测试多个Worker线程共用LLM时调用统计不丢失"""
+        llm = StructuredLLM(model='test-model', api_key='k')
+        usage = Mock(total_tokens=3)
+        response = Mock(usage=usage, choices=[Mock(message=Mock(content='ok'))])
+        llm._client = Mock()
+        llm._client.chat.completions.create.return_value = response
+
+        def call_many():
+            for _ in range(200):
+                llm.simple_call('hi')
+
+        threads = [threading.Thread(target=call_many) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = llm.get_stats()
+        self.assertEqual(stats['call_count'], 1600)
+        self.assertEqual(stats['total_tokens'], 4800)
+
+    def test_duplicate_worker_configs_are_skipped(self):
+        """测试重复的Worker配置不会创建重复的Worker，移除后可以重新添加"""
+        config = {'model': 'test-model', 'specialization': 'algorithm', 'preferred_stages': []}
+
+        with patch('tools.collaborative_framework.StructuredLLM'):
+            generator = CollaborativeCodeGenerator(
+                master_llm=Mock(),
+                worker_configs=[config, dict(reversed(list(config.items())))]
+            )
+            self.addCleanup(generator.close)
+            self.assertEqual(len(generator.workers), 1)
+
+            self.assertFalse(generator.add_worker(dict(config)))
+            self.assertEqual(len(generator.workers), 1)
+
+            self.assertTrue(generator.remove_worker('test-model_algorithm'))
+            self.assertTrue(generator.add_worker(config))
+            self.assertEqual(len(generator.workers), 1)
+
+    def test_workers_with_same_model_and_specialization_are_kept(self):
+        """测试模型和专业相同、其余配置不同的Worker都会保留，并获得唯一ID"""
+        configs = [
+            {'model': 'test-model', 'specialization': 'algorithm', 'temperature': 0.2},
+            {'model': 'test-model', 'specialization': 'algorithm', 'temperature': 0.8},
+            {'model': 'test-model', 'specialization': 'algorithm', 'max_tokens': 500},
+        ]
+
+        with patch('tools.collaborative_framework.StructuredLLM'):
+            generator = CollaborativeCodeGenerator(master_llm=Mock(), worker_configs=configs)
+        self.addCleanup(generator.close)
+
+        self.assertIsInstance(generator.workers, list)
+        self.assertEqual(
+            [worker.worker_id for worker in generator.workers],
+            ['test-model_algorithm', 'test-model_algorithm_2', 'test-model_algorithm_3']
+        )
+        self.assertEqual([w.config.temperature for w in generator.workers][:2], [0.2, 0.8])
+
+        self.assertTrue(generator.remove_worker('test-model_algorithm_2'))
+        self.assertEqual(
+            [worker.worker_id for worker in generator.workers],
+            ['test-model_algorithm', 'test-model_algorithm_3']
+        )
+
+    def test_generator_context_manager_closes_executor(self):
+        """测试退出上下文时关闭Worker线程池"""
+        with CollaborativeCodeGenerator(master_llm=Mock(), worker_configs=[]) as generator:
+            self.assertIsInstance(generator, CollaborativeCodeGenerator)
+
+        with self.assertRaises(RuntimeError):
+            generator._executor.submit(lambda: None)
+
+
+def run_tests():
+    """运行所有测试（安装了 pytest-xdist 时多进程并行）"""
+    import importlib.util
+    import pytest
+
+    print("运行协作框架测试...")
+
+    args = ["-q", __file__]
+    if importlib.util.find_spec("xdist") is not None:
+        args[:0] = ["-n", "auto"]
+
+    success = pytest.main(args) == 0
+
+    # 报告结果（失败详情已由 pytest 输出）
+    if success:
+        print("\n所有测试通过!")
+    else:
+        print("\n测试失败，详情见上方输出")
 
+    return success
 
 if __name__ == "__main__":
     success = run_tests()
@@ -0,0 +1,93 @@
+"""
+测试LLM响应的磁盘缓存
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from pydantic import BaseModel
+
+from llm import SqliteLLMCache, StructuredLLM
+
+
+class Answer(BaseModel):
+    value: int
+
+
+class Other(BaseModel):
+    text: str
+
+
+class TestSqliteLLMCache(unittest.TestCase):
+    """测试SQLite缓存及其在StructuredLLM中的使用"""
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.cache = SqliteLLMCache(os.path.join(self._tmpdir.name, "cache.sqlite3"))
+
+    def tearDown(self):
+        self.cache.close()
+        self._tmpdir.cleanup()
+
+    def test_get_and_set(self):
+        """测试未命中返回None，写入后可读取，重复写入覆盖旧值"""
+        self.assertIsNone(self.cache.get("key"))
+        self.cache.set("key", "value")
+        self.cache.set("key", "newer")
+        self.assertEqual(self.cache.get("key"), "newer")
+        self.assertEqual(len(self.cache), 1)
+
+    def test_request_key_is_canonical(self):
+        """测试请求键为紧凑排序JSON的sha256，不依赖已安装的可选库"""
+        llm = StructuredLLM(api_key="test-key", cache=self.cache)
+        payload = {
+            "model": llm.model,
+            "system": "系统",
+            "prompt": "问题",
+            "schema": f"{Answer.__module__}.{Answer.__qualname__}",
+            "temperature": 0.5,
+            "max_tokens": None,
+        }
+        data = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+        self.assertEqual(
+            llm._request_key("问题", Answer, "系统", 0.5, None),
+            hashlib.sha256(data.encode("utf-8")).hexdigest()
+        )
+
+    def test_structured_llm_reuses_cached_response(self):
+        """测试相同请求第二次直接从缓存返回，不调用API"""
+        llm = StructuredLLM(api_key="test-key", cache=self.cache)
+
+        with patch.object(llm, "_call_structured", return_value=Answer(value=42)) as call:
+            first = llm.generate_structured("question", Answer)
+            second = llm.generate_structured("question", Answer)
+
+        self.assertEqual(call.call_count, 1)
+        self.assertEqual(first, second)
+
+        # 另一个共享同一缓存的实例（如重新运行测试）同样命中
+        other_llm = StructuredLLM(api_key="test-key", cache=self.cache)
+        with patch.object(other_llm, "_call_structured") as call:
+            self.assertEqual(other_llm.generate_structured("question", Answer).value, 42)
+        call.assert_not_called()
+
+    def test_mismatched_cache_entry_is_ignored(self):
+        """测试缓存内容不符合schema时重新请求"""
+        llm = StructuredLLM(api_key="test-key", cache=self.cache)
+        key = llm._request_key("question", Other, "You are a helpful assistant.", 0.7, None)
+        self.cache.set(key, '{"value": 1}')
+
+        with patch.object(llm, "_call_structured", return_value=Other(text="fresh")) as call:
+            result = llm.generate_structured("question", Other)
+
+        self.assertEqual(call.call_count, 1)
+        self.assertEqual(result.text, "fresh")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,18 @@
 from pydantic import BaseModel, Field
 from typing import Any, Dict, Optional
 from abc import ABC, abstractmethod
+import copy
+import functools
 import time
 from enum import Enum
 
 
+@functools.lru_cache(maxsize=None)
+def _input_json_schema(input_schema: type) -> Dict[str, Any]:
+    """生成并缓存输入模型的JSON schema（每个模型类只生成一次）"""
+    return input_schema.model_json_schema()
+
+
 class ToolStatus(Enum):
     """工具执行状态"""
     SUCCESS = "success"
@@ -21,7 +29,11 @@ class ToolInput(BaseModel):
 
 
 class ToolOutput(BaseModel):
-    """工具输出基类"""
+    """工具输出基类
+
+    success_result/error_result/warning_result 的参数来自工具内部，
+    用 model_construct 构建以跳过字段校验。
+    """
     success: bool = Field(description="是否执行成功")
     status: ToolStatus = Field(description="执行状态")
     data: Optional[Any] = Field(default=None, description="返回数据")
@@ -32,7 +44,7 @@ class ToolOutput(BaseModel):
     @classmethod
     def success_result(cls, data: Any, message: str = "", **metadata) -> "ToolOutput":
         """快速创建成功结果"""
-        return cls(
+        return cls.model_construct(
             success=True,
             status=ToolStatus.SUCCESS,
             data=data,
@@ -43,7 +55,7 @@ class ToolOutput(BaseModel):
     @classmethod
     def error_result(cls, message: str, **metadata) -> "ToolOutput":
         """快速创建错误结果"""
-        return cls(
+        return cls.model_construct(
             success=False,
             status=ToolStatus.FAILURE,
             data=None,
@@ -54,7 +66,7 @@ class ToolOutput(BaseModel):
     @classmethod
     def warning_result(cls, data: Any, message: str, **metadata) -> "ToolOutput":
         """快速创建警告结果"""
-        return cls(
+        return cls.model_construct(
             success=True,
             status=ToolStatus.WARNING,
             data=data,
@@ -86,7 +98,7 @@ class Tool(ABC):
 
     def execute(self, input_data: ToolInput) -> ToolOutput:
         """执行工具，包含性能监控和错误处理"""
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         try:
             # 验证输入类型
@@ -99,7 +111,7 @@ class Tool(ABC):
             result = self._execute_impl(input_data)
 
             # 更新统计信息
-            execution_time = time.time() - start_time
+            execution_time = time.perf_counter() - start_time
             self._execution_count += 1
             self._total_time += execution_time
 
@@ -109,7 +121,7 @@ class Tool(ABC):
             return result
 
         except Exception as e:
-            execution_time = time.time() - start_time
+            execution_time = time.perf_counter() - start_time
             return ToolOutput.error_result(
                 f"工具 {self.name} 执行异常: {str(e)}",
                 exception_type=type(e).__name__,
@@ -132,7 +144,8 @@ class Tool(ABC):
             "function": {
                 "name": self.name,
                 "description": self.description,
-                "parameters": self.input_schema.model_json_schema()
+                # 缓存的schema是共享的，返回副本以免调用方修改影响其他调用
+                "parameters": copy.deepcopy(_input_json_schema(self.input_schema))
             }
         }
 
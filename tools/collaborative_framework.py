@@ -8,13 +8,15 @@
 - 智能融合和迭代优化机制
 """
 
-from typing import Dict, List, Any, Optional, Union, Tuple
+from typing import Dict, List, Any, Mapping, Optional, Sequence, Union, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 from abc import ABC, abstractmethod
 import json
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import hashlib
 import time
 
@@ -56,16 +58,32 @@ class QualityMetrics:
 
     @property
     def overall_score(self) -> float:
-        """综合得分"""
-        weights = {
-            'correctness': 0.3,
-            'efficiency': 0.2,
-            'completeness': 0.2,
-            'maintainability': 0.15,
-            'creativity': 0.1,
-            'security': 0.05
+        """综合得分（权重：正确性0.3、效率0.2、完整性0.2、可维护性0.15、创造性0.1、安全性0.05）"""
+        return (
+            self.correctness * 0.3
+            + self.efficiency * 0.2
+            + self.completeness * 0.2
+            + self.maintainability * 0.15
+            + self.creativity * 0.1
+            + self.security * 0.05
+        )
+
+    def to_dict(self) -> Dict[str, float]:
+        """转换为字典（包含综合得分）"""
+        return {
+            'creativity': self.creativity,
+            'correctness': self.correctness,
+            'efficiency': self.efficiency,
+            'completeness': self.completeness,
+            'maintainability': self.maintainability,
+            'security': self.security,
+            'overall_score': self.overall_score
         }
-        return sum(getattr(self, key) * weight for key, weight in weights.items())
+
+
+def overall_scores(metrics: List[QualityMetrics]) -> List[float]:
+    """批量计算一组质量指标的综合得分"""
+    return [m.overall_score for m in metrics]
 
 
 @dataclass
@@ -87,15 +105,7 @@ class StageOutput:
             'worker_id': self.worker_id,
             'content': self.content,
             'confidence': self.confidence,
-            'quality_metrics': {
-                'creativity': self.quality_metrics.creativity,
-                'correctness': self.quality_metrics.correctness,
-                'efficiency': self.quality_metrics.efficiency,
-                'completeness': self.quality_metrics.completeness,
-                'maintainability': self.quality_metrics.maintainability,
-                'security': self.quality_metrics.security,
-                'overall_score': self.quality_metrics.overall_score
-            },
+            'quality_metrics': self.quality_metrics.to_dict(),
             'reasoning': self.reasoning,
             'metadata': self.metadata,
             'timestamp': self.timestamp
@@ -123,15 +133,7 @@ class FusionResult:
             'fusion_strategy': self.fusion_strategy.value,
             'source_workers': self.source_workers,
             'confidence': self.confidence,
-            'quality_metrics': {
-                'creativity': self.quality_metrics.creativity,
-                'correctness': self.quality_metrics.correctness,
-                'efficiency': self.quality_metrics.efficiency,
-                'completeness': self.quality_metrics.completeness,
-                'maintainability': self.quality_metrics.maintainability,
-                'security': self.quality_metrics.security,
-                'overall_score': self.quality_metrics.overall_score
-            },
+            'quality_metrics': self.quality_metrics.to_dict(),
             'fusion_reasoning': self.fusion_reasoning,
             'timestamp': self.timestamp
         }
@@ -172,12 +174,44 @@ class DAGWorkflow:
     def __init__(self):
         self.nodes: Dict[CognitiveStage, DAGNode] = {}
         self.execution_order: List[CognitiveStage] = []
+        self.execution_waves: List[List[CognitiveStage]] = []
+
+        # 每个阶段对应一个比特位，依赖和完成状态用整数位掩码表示
+        self._bit: Dict[CognitiveStage, int] = {}
+        self._deps_mask: Dict[CognitiveStage, int] = {}
+        self._all_mask = 0
+        self._completed_mask = 0
+
+        # 每个依赖在上下文中的键名（添加阶段时生成），以及按阶段缓存的上下文
+        self._dep_keys: Dict[CognitiveStage, List[Tuple[CognitiveStage, str, str]]] = {}
+        self._context_cache: Dict[CognitiveStage, Dict[str, Any]] = {}
+
+    def _stage_bit(self, stage: CognitiveStage) -> int:
+        """获取（必要时分配）阶段对应的比特位"""
+        bit = self._bit.get(stage)
+        if bit is None:
+            bit = self._bit[stage] = 1 << len(self._bit)
+        return bit
 
     def add_stage(self, stage: CognitiveStage, dependencies: List[CognitiveStage] = None):
         """添加认知阶段"""
         node = DAGNode(stage, dependencies or [])
         self.nodes[stage] = node
 
+        self._all_mask |= self._stage_bit(stage)
+        deps_mask = 0
+        for dep in node.dependencies:
+            deps_mask |= self._stage_bit(dep)
+        self._deps_mask[stage] = deps_mask
+        self._dep_keys[stage] = [
+            (dep, f"{dep.value}_result", f"{dep.value}_quality") for dep in node.dependencies
+        ]
+
+        # 结构变化后重新排序，并清空上下文缓存
+        self.execution_order = []
+        self.execution_waves = []
+        self._context_cache.clear()
+
         # 更新依赖关系
         for dep in node.dependencies:
             if dep in self.nodes:
@@ -185,73 +219,91 @@ class DAGWorkflow:
 
     def get_ready_stages(self) -> List[CognitiveStage]:
         """获取可以执行的阶段"""
-        ready = []
-        for stage, node in self.nodes.items():
-            if not node.completed and all(
-                self.nodes[dep].completed for dep in node.dependencies
-            ):
-                ready.append(stage)
-        return ready
+        completed = self._completed_mask
+        return [
+            stage for stage in self.nodes
+            if not completed & self._bit[stage]
+            and completed & self._deps_mask[stage] == self._deps_mask[stage]
+        ]
 
     def mark_completed(self, stage: CognitiveStage, result: FusionResult):
         """标记阶段完成"""
         if stage in self.nodes:
             self.nodes[stage].completed = True
             self.nodes[stage].result = result
+            self._completed_mask |= self._bit[stage]
+
+            # 依赖该阶段的阶段上下文失效
+            bit = self._bit[stage]
+            for dependent, deps_mask in self._deps_mask.items():
+                if deps_mask & bit:
+                    self._context_cache.pop(dependent, None)
+
+    def reset(self):
+        """清除所有阶段的完成状态和结果"""
+        for node in self.nodes.values():
+            node.completed = False
+            node.result = None
+        self._completed_mask = 0
+        self._context_cache.clear()
 
     def get_execution_order(self) -> List[CognitiveStage]:
-        """获取拓扑排序的执行顺序"""
-        if self.execution_order:
-            return self.execution_order
-
-        # 拓扑排序
-        visited = set()
-        temp_visited = set()
-        order = []
-
-        def dfs(stage: CognitiveStage):
-            if stage in temp_visited:
-                raise ValueError(f"检测到循环依赖: {stage}")
-            if stage in visited:
-                return
-
-            temp_visited.add(stage)
-            for dep in self.nodes[stage].dependencies:
-                dfs(dep)
-            temp_visited.remove(stage)
-            visited.add(stage)
-            order.append(stage)
-
-        for stage in self.nodes:
-            if stage not in visited:
-                dfs(stage)
-
-        self.execution_order = order
-        return order
+        """获取拓扑排序的执行顺序（按依赖层级依次展开）"""
+        if not self.execution_order:
+            self.execution_order = [stage for wave in self.get_execution_waves() for stage in wave]
+        return self.execution_order
+
+    def get_execution_waves(self) -> List[List[CognitiveStage]]:
+        """按依赖层级分组的执行顺序，同一层内的阶段互不依赖，可以并发执行
+
+        逐层取出依赖已全部满足的阶段（Kahn算法），已排序集合用位掩码表示。
+        """
+        if self.execution_waves:
+            return self.execution_waves
+
+        waves: List[List[CognitiveStage]] = []
+        done = 0
+        remaining = list(self.nodes)
+        while remaining:
+            wave = [
+                stage for stage in remaining
+                if done & self._deps_mask[stage] == self._deps_mask[stage]
+            ]
+            if not wave:
+                raise ValueError(f"检测到循环依赖或缺失的依赖阶段: {remaining}")
+            for stage in wave:
+                done |= self._bit[stage]
+            waves.append(wave)
+            remaining = [stage for stage in remaining if not done & self._bit[stage]]
+
+        self.execution_waves = waves
+        return waves
 
     def get_context_for_stage(self, stage: CognitiveStage) -> Dict[str, Any]:
-        """获取阶段所需的上下文"""
-        context = {}
-        node = self.nodes[stage]
+        """获取阶段所需的上下文（按阶段缓存，调用方不得修改返回的字典）"""
+        context = self._context_cache.get(stage)
+        if context is not None:
+            return context
 
-        for dep in node.dependencies:
-            dep_node = self.nodes[dep]
-            if dep_node.result:
-                context[f"{dep.value}_result"] = dep_node.result.fused_content
-                context[f"{dep.value}_quality"] = dep_node.result.quality_metrics.overall_score
+        context = {}
+        for dep, result_key, quality_key in self._dep_keys[stage]:
+            dep_result = self.nodes[dep].result
+            if dep_result:
+                context[result_key] = dep_result.fused_content
+                context[quality_key] = dep_result.quality_metrics.overall_score
 
+        self._context_cache[stage] = context
         return context
 
     def is_completed(self) -> bool:
         """检查是否全部完成"""
-        return all(node.completed for node in self.nodes.values())
+        return self._completed_mask == self._all_mask
 
     def get_progress(self) -> float:
         """获取进度百分比"""
         if not self.nodes:
             return 0.0
-        completed_count = sum(1 for node in self.nodes.values() if node.completed)
-        return completed_count / len(self.nodes)
+        return bin(self._completed_mask).count("1") / len(self.nodes)
 
 
 def create_default_workflow() -> DAGWorkflow:
@@ -280,6 +332,36 @@ def create_default_workflow() -> DAGWorkflow:
     return workflow
 
 
+# Worker共用的LLM实例：键为 (模型, 端点, api_key的sha256)，不直接保存明文密钥作为键
+_SHARED_LLM_CACHE_SIZE = 32
+_shared_llms: "OrderedDict[Tuple[str, Optional[str], Optional[str]], StructuredLLM]" = OrderedDict()
+_shared_llms_lock = threading.Lock()
+
+
+def clear_llm_cache():
+    """清空Worker共用的LLM实例（如更换密钥后，或测试中patch了StructuredLLM）"""
+    with _shared_llms_lock:
+        _shared_llms.clear()
+
+
+def _shared_worker_llm(model: str, api_key: Optional[str], base_url: Optional[str]) -> StructuredLLM:
+    """获取Worker使用的LLM实例，相同模型、端点和密钥的Worker共用一个（及其连接池）"""
+    key_digest = hashlib.sha256(api_key.encode("utf-8")).hexdigest() if api_key else None
+    cache_key = (model, base_url, key_digest)
+
+    with _shared_llms_lock:
+        llm = _shared_llms.get(cache_key)
+        if llm is not None:
+            _shared_llms.move_to_end(cache_key)
+            return llm
+
+        llm = StructuredLLM(model=model, api_key=api_key, base_url=base_url)
+        _shared_llms[cache_key] = llm
+        if len(_shared_llms) > _SHARED_LLM_CACHE_SIZE:
+            _shared_llms.popitem(last=False)
+        return llm
+
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -295,10 +377,12 @@ class CollaborativeCodeGenerator:
     def __init__(
         self,
         master_llm: StructuredLLM,
-        worker_configs: List[Dict[str, Any]],
+        worker_configs: Sequence[Mapping[str, Any]],
         workflow: DAGWorkflow = None,
         max_concurrent_workers: int = 3,
-        fusion_threshold: float = 0.7
+        fusion_threshold: float = 0.7,
+        parallel_stages: bool = False,
+        worker_timeout: Optional[float] = 120.0
     ):
         """
         Args:
@@ -307,17 +391,29 @@ class CollaborativeCodeGenerator:
             workflow: DAG工作流（默认使用标准工作流）
             max_concurrent_workers: 最大并发Worker数
             fusion_threshold: 融合阈值
+            parallel_stages: 是否并发执行互不依赖的阶段（按依赖层级分批，不更新 current_stage）
+            worker_timeout: Worker的超时时间（秒），超时的Worker输出被放弃；为None时不限时
         """
         self.master_llm = master_llm
         self.workflow = workflow or create_default_workflow()
         self.max_concurrent_workers = max_concurrent_workers
         self.fusion_threshold = fusion_threshold
+        self.parallel_stages = parallel_stages
+        self.worker_timeout = worker_timeout
+
+        # 各阶段共用的Worker线程池，避免每个阶段重复创建和销毁线程
+        self._executor = self._new_executor()
+        self._abandoned_futures = set()  # 超时被放弃、但线程仍在运行的Worker任务
 
         # 初始化Master Agent
         self.master_agent = None  # 延迟初始化，避免循环导入
 
         # 初始化Worker Agents
-        self.workers = []
+        self.workers: List = []
+        self._workers_by_id: Dict[str, Any] = {}  # worker_id -> WorkerAgent，用于按ID查找
+        self._suitable_workers: Dict[CognitiveStage, List] = {}
+        self._general_workers: Dict[CognitiveStage, List] = {}
+        self._config_hashes: Dict[str, Any] = {}  # 配置哈希 -> Worker，用于跳过重复配置
         self._initialize_workers(worker_configs)
 
         # 执行状态
@@ -327,17 +423,40 @@ class CollaborativeCodeGenerator:
 
         logger.info(f"协作代码生成器初始化: {len(self.workers)} 个Workers")
 
-    def _initialize_workers(self, worker_configs: List[Dict[str, Any]]):
-        """初始化Worker Agents"""
+    def _new_executor(self) -> ThreadPoolExecutor:
+        """创建Worker线程池"""
+        return ThreadPoolExecutor(
+            max_workers=self.max_concurrent_workers,
+            thread_name_prefix="ccg-worker"
+        )
+
+    @staticmethod
+    def _config_hash(config: Mapping[str, Any]) -> str:
+        """计算Worker配置的哈希（键顺序无关）"""
+        canonical = json.dumps(dict(config), sort_keys=True, default=str)
+        return hashlib.sha1(canonical.encode()).hexdigest()
+
+    def _initialize_workers(self, worker_configs: Sequence[Mapping[str, Any]]) -> int:
+        """初始化Worker Agents，已存在相同配置的Worker时跳过
+
+        Returns:
+            新创建的Worker数量
+        """
         from .worker_agent import WorkerAgent, WorkerConfig
 
+        added = 0
         for config in worker_configs:
+            config_hash = self._config_hash(config)
+            if config_hash in self._config_hashes:
+                logger.info(f"跳过重复的Worker配置: {config.get('specialization', 'general')}")
+                continue
+
             try:
-                # 创建LLM实例
-                worker_llm = StructuredLLM(
-                    model=config.get('model', 'gpt-4o'),
-                    api_key=config.get('api_key'),
-                    base_url=config.get('base_url')
+                # 获取LLM实例
+                worker_llm = _shared_worker_llm(
+                    config.get('model', 'gpt-4o'),
+                    config.get('api_key'),
+                    config.get('base_url')
                 )
 
                 # 创建Worker配置
@@ -350,13 +469,44 @@ class CollaborativeCodeGenerator:
                     preferred_stages=config.get('preferred_stages', [])
                 )
 
-                # 创建Worker
+                # 创建Worker；模型和专业相同但其余配置不同的Worker加序号区分ID
                 worker = WorkerAgent(worker_llm, worker_config)
+                worker.worker_id = self._unique_worker_id(worker.worker_id)
                 self.workers.append(worker)
+                self._workers_by_id[worker.worker_id] = worker
+                self._config_hashes[config_hash] = worker
+                added += 1
 
             except Exception as e:
                 logger.error(f"初始化Worker失败: {e}")
 
+        self._rebuild_suitability_cache()
+        return added
+
+    def _unique_worker_id(self, worker_id: str) -> str:
+        """ID已被占用时依次追加序号（_2、_3……），返回未使用的ID"""
+        candidate, n = worker_id, 1
+        while candidate in self._workers_by_id:
+            n += 1
+            candidate = f"{worker_id}_{n}"
+        return candidate
+
+    def _rebuild_suitability_cache(self):
+        """按阶段预先划分专业Workers和通用Workers，Worker增减时重建"""
+        from .worker_agent import WorkerAgent
+
+        self._suitable_workers = {stage: [] for stage in CognitiveStage}
+        self._general_workers = {stage: [] for stage in CognitiveStage}
+
+        for worker in self.workers:
+            is_worker_agent = isinstance(worker, WorkerAgent)
+            is_general = hasattr(worker, 'config') and worker.config.specialization == 'general'
+            for stage in CognitiveStage:
+                if is_worker_agent and worker.is_suitable_for_stage(stage):
+                    self._suitable_workers[stage].append(worker)
+                elif is_general:
+                    self._general_workers[stage].append(worker)
+
     def _initialize_master_agent(self):
         """延迟初始化Master Agent"""
         if self.master_agent is None:
@@ -394,27 +544,30 @@ class CollaborativeCodeGenerator:
             self._reset_state()
 
             # 执行DAG工作流
-            execution_order = self.workflow.get_execution_order()
-            logger.info(f"执行顺序: {[stage.value for stage in execution_order]}")
+            if self.parallel_stages:
+                self._execute_stage_waves(context)
+            else:
+                execution_order = self.workflow.get_execution_order()
+                logger.info(f"执行顺序: {[stage.value for stage in execution_order]}")
 
-            for stage in execution_order:
-                if self.workflow.nodes[stage].completed:
-                    continue
+                for stage in execution_order:
+                    if self.workflow.nodes[stage].completed:
+                        continue
 
-                logger.info(f"开始执行阶段: {stage.value}")
-                stage_result = self._execute_stage(stage, context)
+                    logger.info(f"开始执行阶段: {stage.value}")
+                    stage_result = self._execute_stage(stage, context)
 
-                if stage_result:
-                    self.workflow.mark_completed(stage, stage_result)
-                    self.stage_results[stage] = stage_result
+                    if stage_result:
+                        self.workflow.mark_completed(stage, stage_result)
+                        self.stage_results[stage] = stage_result
 
-                    # 更新上下文
-                    context.update(self.workflow.get_context_for_stage(stage))
+                        # 更新上下文
+                        context.update(self.workflow.get_context_for_stage(stage))
 
-                    logger.info(f"阶段 {stage.value} 完成，质量得分: {stage_result.quality_metrics.overall_score:.2f}")
-                else:
-                    logger.error(f"阶段 {stage.value} 执行失败")
-                    break
+                        logger.info(f"阶段 {stage.value} 完成，质量得分: {stage_result.quality_metrics.overall_score:.2f}")
+                    else:
+                        logger.error(f"阶段 {stage.value} 执行失败")
+                        break
 
             # 生成最终结果
             final_result = self._generate_final_result(context, time.time() - start_time)
@@ -431,6 +584,62 @@ class CollaborativeCodeGenerator:
                 'execution_time': time.time() - start_time
             }
 
+    def _execute_stage_waves(self, context: Dict[str, Any]):
+        """按依赖层级执行DAG，同一层内的阶段并发执行
+
+        同层阶段共享进入该层时的上下文，并各自补充其前置阶段的结果；
+        任一阶段失败时，等待本层结束后停止。
+
+        整层所有阶段的Worker任务一起交给共用线程池，同时运行的Worker不超过
+        max_concurrent_workers，超时也从各Worker开始运行时计时；各阶段的Master融合
+        随后并发进行。同一Worker可能同时处理多个阶段，此模式下不更新 current_stage。
+        """
+        for wave in self.workflow.get_execution_waves():
+            pending = [stage for stage in wave if not self.workflow.nodes[stage].completed]
+            if not pending:
+                continue
+
+            logger.info(f"并发执行阶段: {[stage.value for stage in pending]}")
+            stage_contexts = {
+                stage: {**context, **self.workflow.get_context_for_stage(stage)}
+                for stage in pending
+            }
+
+            tasks = []
+            for stage in pending:
+                workers, previous_results = self._prepare_stage(stage)
+                tasks.extend(
+                    (worker, stage, stage_contexts[stage], previous_results) for worker in workers
+                )
+
+            stage_outputs = {stage: [] for stage in pending}
+            for (_, stage, _, _), output in zip(tasks, self._run_worker_tasks(tasks)):
+                if output:
+                    stage_outputs[stage].append(output)
+
+            if len(pending) == 1:
+                results = [self._fuse_stage(pending[0], stage_outputs[pending[0]], stage_contexts[pending[0]])]
+            else:
+                with ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix="ccg-fusion") as executor:
+                    results = list(executor.map(
+                        lambda stage: self._fuse_stage(stage, stage_outputs[stage], stage_contexts[stage]),
+                        pending
+                    ))
+
+            failed = False
+            for stage, stage_result in zip(pending, results):
+                if stage_result:
+                    self.workflow.mark_completed(stage, stage_result)
+                    self.stage_results[stage] = stage_result
+                    context.update(self.workflow.get_context_for_stage(stage))
+                    logger.info(f"阶段 {stage.value} 完成，质量得分: {stage_result.quality_metrics.overall_score:.2f}")
+                else:
+                    logger.error(f"阶段 {stage.value} 执行失败")
+                    failed = True
+
+            if failed:
+                break
+
     def _reset_state(self):
         """重置执行状态"""
         self.current_stage = None
@@ -438,9 +647,7 @@ class CollaborativeCodeGenerator:
         self.execution_history.clear()
 
         # 重置工作流状态
-        for node in self.workflow.nodes.values():
-            node.completed = False
-            node.result = None
+        self.workflow.reset()
 
     def _execute_stage(
         self,
@@ -459,39 +666,40 @@ class CollaborativeCodeGenerator:
         """
         self.current_stage = stage
 
-        # 选择适合的Workers
+        # 选择适合的Workers并行执行
+        workers, previous_results = self._prepare_stage(stage)
+        stage_outputs = self._execute_workers_parallel(
+            workers, stage, context, previous_results
+        )
+
+        return self._fuse_stage(stage, stage_outputs, context)
+
+    def _prepare_stage(self, stage: CognitiveStage) -> Tuple[List, Dict[CognitiveStage, Any]]:
+        """选择执行阶段的Workers，并收集其前置阶段的结果"""
         suitable_workers = self._select_suitable_workers(stage)
 
         if not suitable_workers:
             logger.warning(f"没有找到适合阶段 {stage.value} 的Workers，使用所有Workers")
             suitable_workers = self.workers[:self.max_concurrent_workers]
 
-        # 获取前置结果
         previous_results = {
             dep_stage: self.stage_results[dep_stage]
             for dep_stage in self.workflow.nodes[stage].dependencies
             if dep_stage in self.stage_results
         }
+        return suitable_workers, previous_results
 
-        # 并行执行Workers
-        stage_outputs = []
-
-        if len(suitable_workers) <= self.max_concurrent_workers:
-            # 可以并行执行所有Workers
-            stage_outputs = self._execute_workers_parallel(
-                suitable_workers, stage, context, previous_results
-            )
-        else:
-            # 分批执行
-            stage_outputs = self._execute_workers_batched(
-                suitable_workers, stage, context, previous_results
-            )
-
+    def _fuse_stage(
+        self,
+        stage: CognitiveStage,
+        stage_outputs: List[StageOutput],
+        context: Dict[str, Any]
+    ) -> Optional[FusionResult]:
+        """由Master融合阶段的Worker输出，失败时返回None"""
         if not stage_outputs:
             logger.error(f"阶段 {stage.value} 没有收到任何有效输出")
             return None
 
-        # Master融合
         try:
             fusion_result = self.master_agent.judge_stage_outputs(
                 stage, stage_outputs, context
@@ -515,21 +723,11 @@ class CollaborativeCodeGenerator:
 
     def _select_suitable_workers(self, stage: CognitiveStage) -> List:
         """选择适合当前阶段的Workers"""
-        from .worker_agent import WorkerAgent
-
-        suitable = []
-        general_workers = []
-
-        for worker in self.workers:
-            if isinstance(worker, WorkerAgent) and worker.is_suitable_for_stage(stage):
-                suitable.append(worker)
-            elif hasattr(worker, 'config') and worker.config.specialization == 'general':
-                general_workers.append(worker)
+        suitable = list(self._suitable_workers.get(stage, ()))
 
         # 如果专业Workers不足，补充通用Workers
-        if len(suitable) < 2 and general_workers:
-            needed = min(2 - len(suitable), len(general_workers))
-            suitable.extend(general_workers[:needed])
+        if len(suitable) < 2:
+            suitable.extend(self._general_workers.get(stage, ())[:2 - len(suitable)])
 
         return suitable
 
@@ -540,51 +738,138 @@ class CollaborativeCodeGenerator:
         context: Dict[str, Any],
         previous_results: Dict[CognitiveStage, Any]
     ) -> List[StageOutput]:
-        """并行执行Workers"""
-        stage_outputs = []
-
-        with ThreadPoolExecutor(max_workers=len(workers)) as executor:
-            # 提交任务
-            future_to_worker = {}
-            for worker in workers:
-                future = executor.submit(
-                    worker.process_stage,
-                    stage, context, previous_results
-                )
-                future_to_worker[future] = worker
-
-            # 收集结果
-            for future in as_completed(future_to_worker, timeout=120):
-                worker = future_to_worker[future]
-                try:
-                    output = future.result()
-                    if output:
-                        stage_outputs.append(output)
-                        logger.info(f"Worker {worker.worker_id} 完成阶段 {stage.value}")
-                except Exception as e:
-                    logger.error(f"Worker {worker.worker_id} 执行失败: {e}")
-
-        return stage_outputs
-
-    def _execute_workers_batched(
+        """并行执行单个阶段的Workers，返回有效的输出"""
+        outputs = self._run_worker_tasks(
+            [(worker, stage, context, previous_results) for worker in workers]
+        )
+        return [output for output in outputs if output]
+
+    def _run_worker_tasks(
         self,
-        workers: List,
+        tasks: List[Tuple[Any, CognitiveStage, Dict[str, Any], Dict[CognitiveStage, Any]]]
+    ) -> List[Optional[StageOutput]]:
+        """在共用线程池中执行一组Worker任务
+
+        每个任务为 (worker, stage, context, previous_results)，返回与任务一一对应的输出，
+        失败或超时的任务对应None。
+
+        任务全部交给线程池执行（包括只有一个任务时），超过 max_concurrent_workers 时排队，
+        任一任务结束即开始下一个。当前线程只负责等待，因此每个Worker都受超时约束。
+
+        超时从Worker开始运行时计时，在线程池中排队的时间不计入。正在运行的线程无法被中断，
+        超时的Worker只是被放弃：其线程继续运行直到调用返回，结果被丢弃。为了不让这些线程
+        占住线程池，放弃Worker后会换用新的线程池，尚未开始的任务转到新线程池执行；
+        旧线程池在剩余任务结束后自行退出。
+        """
+        outputs: List[Optional[StageOutput]] = [None] * len(tasks)
+        started: Dict[int, float] = {}  # 任务序号 -> 开始运行的时间
+
+        def run(index: int) -> Optional[StageOutput]:
+            started[index] = time.monotonic()
+            return self._run_worker(*tasks[index])
+
+        # 提交任务
+        future_to_index = {self._executor.submit(run, index): index for index in range(len(tasks))}
+
+        # 收集结果；超时未完成的Worker被放弃，已完成的输出保留
+        pending = set(future_to_index)
+        while pending:
+            done, pending = wait(
+                pending,
+                timeout=self._next_timeout(pending, future_to_index, started),
+                return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                outputs[future_to_index[future]] = future.result()
+
+            if self.worker_timeout is not None:
+                now = time.monotonic()
+                expired = {
+                    future for future in pending
+                    if now - started.get(future_to_index[future], now) >= self.worker_timeout
+                }
+                for future in expired:
+                    worker, stage = tasks[future_to_index[future]][:2]
+                    logger.warning(
+                        f"Worker {worker.worker_id} 执行超时，放弃其阶段 {stage.value} 输出"
+                        f"（线程无法中断，仍在后台运行）"
+                    )
+                if expired:
+                    pending -= expired
+                    self._abandoned_futures.update(expired)
+                    pending = self._replace_executor(pending, future_to_index, tasks, run)
+
+        return outputs
+
+    def _replace_executor(
+        self,
+        pending: set,
+        future_to_index: Dict[Any, int],
+        tasks: List[Tuple[Any, ...]],
+        run
+    ) -> set:
+        """换用新的线程池，并把尚未开始的任务转移过去
+
+        Returns:
+            转移后仍需等待的任务
+        """
+        old_executor, self._executor = self._executor, self._new_executor()
+        self._abandoned_futures = {f for f in self._abandoned_futures if not f.done()}
+        logger.warning(
+            f"{len(self._abandoned_futures)} 个超时Worker仍在运行，已换用新的Worker线程池"
+        )
+
+        remaining = set()
+        for future in pending:
+            # 只有尚未开始的任务能取消成功
+            if future.cancel():
+                index = future_to_index.pop(future)
+                logger.info(f"Worker {tasks[index][0].worker_id} 尚未开始，转到新的线程池执行")
+                future = self._executor.submit(run, index)
+                future_to_index[future] = index
+            remaining.add(future)
+
+        old_executor.shutdown(wait=False)
+        return remaining
+
+    def _next_timeout(
+        self,
+        pending: set,
+        future_to_index: Dict[Any, int],
+        started: Dict[int, float]
+    ) -> Optional[float]:
+        """计算下一次等待的时长：到最早开始的Worker超时为止
+
+        还没有Worker开始运行时等待一个完整的超时时间，之后重新检查。
+        """
+        if self.worker_timeout is None:
+            return None
+        start_times = [
+            started[future_to_index[future]]
+            for future in pending
+            if future_to_index[future] in started
+        ]
+        if not start_times:
+            return self.worker_timeout
+        return max(0.0, min(start_times) + self.worker_timeout - time.monotonic())
+
+    def _run_worker(
+        self,
+        worker,
         stage: CognitiveStage,
         context: Dict[str, Any],
         previous_results: Dict[CognitiveStage, Any]
-    ) -> List[StageOutput]:
-        """分批执行Workers"""
-        stage_outputs = []
-        batch_size = self.max_concurrent_workers
-
-        for i in range(0, len(workers), batch_size):
-            batch = workers[i:i + batch_size]
-            batch_outputs = self._execute_workers_parallel(
-                batch, stage, context, previous_results
-            )
-            stage_outputs.extend(batch_outputs)
+    ) -> Optional[StageOutput]:
+        """执行单个Worker，失败时记录日志并返回None"""
+        try:
+            output = worker.process_stage(stage, context, previous_results)
+        except Exception as e:
+            logger.error(f"Worker {worker.worker_id} 执行失败: {e}")
+            return None
 
-        return stage_outputs
+        if output:
+            logger.info(f"Worker {worker.worker_id} 完成阶段 {stage.value}")
+        return output
 
     def _generate_final_result(self, context: Dict[str, Any], execution_time: float) -> Dict[str, Any]:
         """生成最终结果"""
@@ -606,16 +891,21 @@ class CollaborativeCodeGenerator:
                 'execution_time': execution_time
             }
 
-        # 计算总体统计
-        quality_scores = [
-            result.quality_metrics.overall_score
-            for result in self.stage_results.values()
-        ]
-
-        confidence_scores = [
-            result.confidence
-            for result in self.stage_results.values()
-        ]
+        # 计算总体统计（一次遍历累计质量得分和置信度）
+        count = 0
+        quality_sum = confidence_sum = 0.0
+        quality_min = quality_max = 0.0
+        for result in self.stage_results.values():
+            score = result.quality_metrics.overall_score
+            if count == 0:
+                quality_min = quality_max = score
+            elif score < quality_min:
+                quality_min = score
+            elif score > quality_max:
+                quality_max = score
+            quality_sum += score
+            confidence_sum += result.confidence
+            count += 1
 
         return {
             'success': True,
@@ -631,10 +921,10 @@ class CollaborativeCodeGenerator:
             'execution_history': self.execution_history,
 
             # 统计信息
-            'avg_quality_score': statistics.mean(quality_scores) if quality_scores else 0,
-            'min_quality_score': min(quality_scores) if quality_scores else 0,
-            'max_quality_score': max(quality_scores) if quality_scores else 0,
-            'avg_confidence': statistics.mean(confidence_scores) if confidence_scores else 0,
+            'avg_quality_score': quality_sum / count if count else 0,
+            'min_quality_score': quality_min,
+            'max_quality_score': quality_max,
+            'avg_confidence': confidence_sum / count if count else 0,
 
             # 详细结果
             'stage_results': {
@@ -656,13 +946,15 @@ class CollaborativeCodeGenerator:
             'stages_completed': len(self.stage_results),
             'total_stages': len(self.workflow.nodes),
             'progress_percentage': self.workflow.get_progress() * 100,
+            'abandoned_workers_running': sum(not f.done() for f in self._abandoned_futures),
             'execution_history': self.execution_history
         }
 
     def add_worker(self, worker_config: Dict[str, Any]) -> bool:
         """动态添加Worker"""
         try:
-            self._initialize_workers([worker_config])
+            if not self._initialize_workers([worker_config]):
+                return False
             logger.info(f"成功添加Worker: {worker_config.get('specialization', 'general')}")
             return True
         except Exception as e:
@@ -671,14 +963,18 @@ class CollaborativeCodeGenerator:
 
     def remove_worker(self, worker_id: str) -> bool:
         """移除Worker"""
-        for i, worker in enumerate(self.workers):
-            if worker.worker_id == worker_id:
-                self.workers.pop(i)
-                logger.info(f"移除Worker: {worker_id}")
-                return True
+        worker = self._workers_by_id.pop(worker_id, None)
+        if worker is None:
+            logger.warning(f"未找到Worker: {worker_id}")
+            return False
 
-        logger.warning(f"未找到Worker: {worker_id}")
-        return False
+        self.workers = [w for w in self.workers if w is not worker]
+        self._config_hashes = {
+            h: w for h, w in self._config_hashes.items() if w is not worker
+        }
+        self._rebuild_suitability_cache()
+        logger.info(f"移除Worker: {worker_id}")
+        return True
 
     def get_worker_stats(self) -> Dict[str, Any]:
         """获取Worker统计信息"""
@@ -700,6 +996,20 @@ class CollaborativeCodeGenerator:
         self.workflow = custom_workflow
         logger.info("工作流已更新")
 
+    def close(self):
+        """关闭Worker线程池（等待执行中的任务结束）
+
+        超时被放弃的Worker所在的旧线程池已经关闭，不在这里等待；
+        这些线程仍会在解释器退出前结束其当前调用。
+        """
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "CollaborativeCodeGenerator":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
     def __str__(self) -> str:
         return f"CollaborativeCodeGenerator(workers={len(self.workers)}, stages={len(self.workflow.nodes)})"
 
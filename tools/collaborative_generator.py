@@ -4,9 +4,12 @@
 提供简化的API来使用多模型协作代码生成功能。
 """
 
+import asyncio
+import functools
 import os
 import json
-from typing import Dict, List, Any, Optional
+from types import MappingProxyType
+from typing import Dict, List, Any, Mapping, Optional, Sequence, Tuple
 from llm.structured_llm import StructuredLLM
 from .collaborative_framework import (
     CollaborativeCodeGenerator, DAGWorkflow, create_default_workflow,
@@ -16,7 +19,7 @@ from .collaborative_framework import (
 
 def create_collaborative_generator(
     master_model_config: Dict[str, Any],
-    worker_configs: List[Dict[str, Any]],
+    worker_configs: Sequence[Mapping[str, Any]],
     workflow_type: str = "default",
     max_concurrent_workers: int = 3,
     fusion_threshold: float = 0.7
@@ -95,45 +98,37 @@ def create_research_workflow() -> DAGWorkflow:
     return workflow
 
 
-def create_default_team_config() -> List[Dict[str, Any]]:
-    """创建默认的Worker团队配置"""
-    api_key = os.getenv('OPENAI_API_KEY')
-    base_url = os.getenv('OPENAI_BASE_URL')
+# 默认团队的成员配置（不含连接信息），按 (model, specialization, temperature, expertise_areas) 排列
+_DEFAULT_TEAM = (
+    ('gpt-4o', 'algorithm', 0.2, ('algorithms', 'data_structures', 'complexity_analysis')),
+    ('gpt-4o', 'architecture', 0.3, ('system_design', 'software_architecture', 'design_patterns')),
+    ('gpt-4o', 'performance', 0.2, ('optimization', 'profiling', 'scalability')),
+    ('gpt-4o', 'testing', 0.3, ('unit_testing', 'integration_testing', 'test_driven_development')),
+)
 
-    return [
-        {
-            'model': 'gpt-4o',
-            'specialization': 'algorithm',
-            'api_key': api_key,
-            'base_url': base_url,
-            'temperature': 0.2,
-            'expertise_areas': ['algorithms', 'data_structures', 'complexity_analysis']
-        },
-        {
-            'model': 'gpt-4o',
-            'specialization': 'architecture',
-            'api_key': api_key,
-            'base_url': base_url,
-            'temperature': 0.3,
-            'expertise_areas': ['system_design', 'software_architecture', 'design_patterns']
-        },
-        {
-            'model': 'gpt-4o',
-            'specialization': 'performance',
-            'api_key': api_key,
-            'base_url': base_url,
-            'temperature': 0.2,
-            'expertise_areas': ['optimization', 'profiling', 'scalability']
-        },
-        {
-            'model': 'gpt-4o',
-            'specialization': 'testing',
+
+@functools.lru_cache(maxsize=8)
+def _default_team_config(api_key: Optional[str], base_url: Optional[str]) -> Tuple[Mapping[str, Any], ...]:
+    """按连接信息构建并缓存默认团队配置（只读视图，避免调用方修改缓存）"""
+    return tuple(
+        MappingProxyType({
+            'model': model,
+            'specialization': specialization,
             'api_key': api_key,
             'base_url': base_url,
-            'temperature': 0.3,
-            'expertise_areas': ['unit_testing', 'integration_testing', 'test_driven_development']
-        }
-    ]
+            'temperature': temperature,
+            'expertise_areas': expertise_areas
+        })
+        for model, specialization, temperature, expertise_areas in _DEFAULT_TEAM
+    )
+
+
+def create_default_team_config() -> Tuple[Mapping[str, Any], ...]:
+    """创建默认的Worker团队配置
+
+    连接信息每次从环境变量读取，相同连接信息复用同一组只读配置。
+    """
+    return _default_team_config(os.getenv('OPENAI_API_KEY'), os.getenv('OPENAI_BASE_URL'))
 
 
 def create_multi_model_team_config() -> List[Dict[str, Any]]:
@@ -181,18 +176,31 @@ def create_multi_model_team_config() -> List[Dict[str, Any]]:
 
     # 如果没有配置多个模型，使用默认配置
     if not configs:
-        configs = create_default_team_config()
+        configs = list(create_default_team_config())
 
     return configs
 
 
 class CollaborativeSession:
-    """协作会话管理器"""
+    """协作会话管理器
+
+    会话持有生成器的Worker线程池，结束时调用 close() 或使用 with 语句释放。
+    """
 
     def __init__(self, generator: CollaborativeCodeGenerator):
         self.generator = generator
         self.session_history = []
 
+    def close(self):
+        """关闭会话使用的生成器"""
+        self.generator.close()
+
+    def __enter__(self) -> "CollaborativeSession":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
     def generate(self, requirement: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """生成代码并记录会话历史"""
         result = self.generator.generate_code(requirement, context)
@@ -208,6 +216,19 @@ class CollaborativeSession:
 
         return result
 
+    def run_batch(self, requirements: List[str], context: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """批量生成代码，按顺序返回每个需求的结果
+
+        生成器在执行期间持有工作流状态，因此同一会话内的需求依次执行。
+        """
+        return [self.generate(requirement, context) for requirement in requirements]
+
+    async def run_batch_async(
+        self, requirements: List[str], context: Dict[str, Any] = None
+    ) -> List[Dict[str, Any]]:
+        """异步批量生成代码，在工作线程中执行，不阻塞事件循环"""
+        return await asyncio.to_thread(self.run_batch, requirements, context)
+
     def get_progress(self) -> Dict[str, Any]:
         """获取当前进度"""
         return self.generator.get_progress()
@@ -273,16 +294,13 @@ def quick_generate(
         else:
             worker_configs = create_default_team_config()
 
-        # 创建生成器
-        generator = create_collaborative_generator(
+        # 创建生成器并生成代码，结束后释放Worker线程池
+        with create_collaborative_generator(
             master_model_config=model_config,
             worker_configs=worker_configs,
             workflow_type=workflow_type
-        )
-
-        # 生成代码
-        result = generator.generate_code(requirement)
-        return result
+        ) as generator:
+            return generator.generate_code(requirement)
 
     except Exception as e:
         logger.error(f"快速生成失败: {e}")
@@ -325,26 +343,25 @@ if __name__ == "__main__":
             workflow_type="default"
         )
 
-        # 创建会话
-        session = CollaborativeSession(generator)
-
-        # 生成代码
-        result = session.generate(
-            requirement="实现一个高效的排序算法，支持自定义比较函数",
-            context={'performance_priority': True}
-        )
-
-        # 显示结果
-        if result['success']:
-            print(f"生成成功! 执行时间: {result['execution_time']:.2f}秒")
-            print(f"阶段完成: {result['stages_completed']}/{result['total_stages']}")
-
-            # 获取会话总结
-            summary = session.get_session_summary()
-            print(f"会话总结: {summary}")
-
-        # 导出会话（可选）
-        # session.export_session("collaborative_session.json")
+        # 创建会话（退出时关闭生成器）
+        with CollaborativeSession(generator) as session:
+            # 生成代码
+            result = session.generate(
+                requirement="实现一个高效的排序算法，支持自定义比较函数",
+                context={'performance_priority': True}
+            )
+
+            # 显示结果
+            if result['success']:
+                print(f"生成成功! 执行时间: {result['execution_time']:.2f}秒")
+                print(f"阶段完成: {result['stages_completed']}/{result['total_stages']}")
+
+                # 获取会话总结
+                summary = session.get_session_summary()
+                print(f"会话总结: {summary}")
+
+            # 导出会话（可选）
+            # session.export_session("collaborative_session.json")
 
     except Exception as e:
         print(f"会话示例失败: {e}")
\ No newline at end of file
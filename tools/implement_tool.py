@@ -20,11 +20,6 @@ class Implementation(BaseModel):
     test_cases: List[str] = Field(description="基于示例生成的测试用例代码")
 
 
-class ImplementOutput(ToolOutput):
-    """实现代码的输出"""
-    data: Implementation
-
-
 class ImplementTool(Tool):
     """代码实现工具"""
     name = "implement_function"
@@ -32,11 +27,12 @@ class ImplementTool(Tool):
     input_schema = ImplementInput
 
     def __init__(self, llm):
+        super().__init__()
         self.llm = llm
 
-    def execute(self, input: ImplementInput) -> ImplementOutput:
+    def _execute_impl(self, input_data: ImplementInput) -> ToolOutput:
         """实现函数"""
-        spec = input.spec
+        spec = input_data.spec
 
         # 构建详细的实现提示
         examples_str = "\n".join([
@@ -72,7 +68,7 @@ class ImplementTool(Tool):
 
 复杂度要求：{spec.complexity if spec.complexity else "尽可能优化"}
 
-代码风格：{input.style}
+代码风格：{input_data.style}
 
 要求：
 1. 实现完整的函数代码
@@ -100,17 +96,12 @@ class ImplementTool(Tool):
                 system="你是一个专业的Python开发者，擅长编写清晰、高效、健壮的代码。"
             )
 
-            return ImplementOutput(
-                success=True,
+            return ToolOutput.success_result(
                 data=response,
                 message=f"已实现函数：{spec.name}"
             )
         except Exception as e:
-            return ImplementOutput(
-                success=False,
-                data=None,
-                message=f"实现函数失败：{str(e)}"
-            )
+            return ToolOutput.error_result(f"实现函数失败：{str(e)}")
 
     def _format_parameters(self, parameters: List) -> str:
         """格式化参数列表"""
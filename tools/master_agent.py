@@ -16,7 +16,7 @@ from collections import defaultdict
 
 from .collaborative_framework import (
     CognitiveStage, FusionStrategy, StageOutput, FusionResult, QualityMetrics,
-    StageOutputSchema, FusionAnalysisSchema, logger
+    StageOutputSchema, FusionAnalysisSchema, logger, overall_scores
 )
 from llm.structured_llm import StructuredLLM
 
@@ -235,15 +235,17 @@ class MasterAgent:
         if not outputs:
             return {}
 
-        # 简单的得分排序
-        sorted_outputs = sorted(outputs, key=lambda x: x.quality_metrics.overall_score, reverse=True)
+        # 简单的得分排序（每个输出的得分只计算一次）
+        scores = overall_scores([output.quality_metrics for output in outputs])
+        ranking = sorted(range(len(outputs)), key=scores.__getitem__, reverse=True)
+        best = ranking[0]
 
         return {
             'basic_analysis': True,
-            'best_output_id': sorted_outputs[0].worker_id,
-            'quality_ranking': [output.worker_id for output in sorted_outputs],
-            'avg_quality': statistics.mean([output.quality_metrics.overall_score for output in outputs]),
-            'should_fuse': len(outputs) > 1 and sorted_outputs[0].quality_metrics.overall_score < self.fusion_threshold * 100
+            'best_output_id': outputs[best].worker_id,
+            'quality_ranking': [outputs[i].worker_id for i in ranking],
+            'avg_quality': statistics.mean(scores),
+            'should_fuse': len(outputs) > 1 and scores[best] < self.fusion_threshold * 100
         }
 
     def _select_fusion_strategy(
@@ -269,7 +271,7 @@ class MasterAgent:
                 return strategy_mapping[recommended]
 
         # 降级到基于规则的策略选择
-        quality_scores = [output.quality_metrics.overall_score for output in outputs]
+        quality_scores = overall_scores([output.quality_metrics for output in outputs])
         max_quality = max(quality_scores)
         quality_variance = statistics.stdev(quality_scores) if len(quality_scores) > 1 else 0
 
@@ -316,12 +318,10 @@ class MasterAgent:
     ) -> FusionResult:
         """加权融合多个输出"""
         # 计算权重（基于质量得分和置信度）
-        weights = []
-        total_score = sum(output.quality_metrics.overall_score * output.confidence for output in outputs)
-
-        for output in outputs:
-            weight = (output.quality_metrics.overall_score * output.confidence) / total_score
-            weights.append(weight)
+        scores = overall_scores([output.quality_metrics for output in outputs])
+        weighted_scores = [score * output.confidence for score, output in zip(scores, outputs)]
+        total_score = sum(weighted_scores)
+        weights = [weighted / total_score for weighted in weighted_scores]
 
         # 构建融合提示
         fusion_prompt = self._build_weighted_merge_prompt(stage, outputs, weights)
@@ -12,11 +12,6 @@ class RefineInput(ToolInput):
     validation_result: ValidationResult = Field(description="验证结果")
 
 
-class RefineOutput(ToolOutput):
-    """优化代码的输出"""
-    data: Implementation
-
-
 class RefineTool(Tool):
     """代码优化工具"""
     name = "refine_code"
@@ -24,13 +19,14 @@ class RefineTool(Tool):
     input_schema = RefineInput
 
     def __init__(self, llm):
+        super().__init__()
         self.llm = llm
 
-    def execute(self, input: RefineInput) -> RefineOutput:
+    def _execute_impl(self, input_data: RefineInput) -> ToolOutput:
         """优化代码"""
-        spec = input.spec
-        code = input.code
-        validation = input.validation_result
+        spec = input_data.spec
+        code = input_data.code
+        validation = input_data.validation_result
 
         # 构建失败测试的详细信息
         failed_tests_info = []
@@ -106,14 +102,9 @@ class RefineTool(Tool):
                 system="你是一个专业的代码审查者和问题解决专家，擅长调试和优化代码。你特别重视代码的简洁性和行有效性。"
             )
 
-            return RefineOutput(
-                success=True,
+            return ToolOutput.success_result(
                 data=response,
                 message=f"已优化代码，修复了 {validation.total_tests - validation.passed_count} 个测试，优化了代码行有效性"
             )
         except Exception as e:
-            return RefineOutput(
-                success=False,
-                data=None,
-                message=f"优化代码失败：{str(e)}"
-            )
+            return ToolOutput.error_result(f"优化代码失败：{str(e)}")
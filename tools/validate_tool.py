@@ -1,9 +1,25 @@
 from pydantic import BaseModel, Field
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
+from collections import OrderedDict
+import ast
+import hashlib
+import threading
 from tools.base import Tool, ToolInput, ToolOutput
 from tools.spec_tool import FunctionSpec
 from core import CodeExecutor, ExecutionStatus
-from cognitive.line_effectiveness_validator import LineEffectivenessValidator
+from cognitive.line_effectiveness_validator import LineEffectivenessValidator, CodeEffectivenessReport
+
+
+# 验证结果缓存：相同规范 + 相同代码的验证结果可以直接复用（validate → refine → re-validate 循环）
+_VALIDATION_CACHE_SIZE = 256
+_validation_cache: "OrderedDict[Tuple[bytes, bytes], ToolOutput]" = OrderedDict()
+_validation_cache_lock = threading.Lock()
+
+
+def clear_validation_cache():
+    """清空验证结果缓存"""
+    with _validation_cache_lock:
+        _validation_cache.clear()
 
 
 class ValidateInput(ToolInput):
@@ -54,16 +70,48 @@ class ValidateTool(Tool):
     description = "执行代码并根据规范验证其正确性，返回详细的测试结果"
     input_schema = ValidateInput
 
+    # 驱动代码输出汇总结果时使用的行前缀
+    RESULTS_MARKER = "VALIDATION_RESULTS:"
+
     def __init__(self):
         super().__init__()
         self.executor = CodeExecutor(timeout=30.0, enable_security=True)
         self.line_validator = LineEffectivenessValidator()
 
     def _execute_impl(self, input_data: ValidateInput) -> ToolOutput:
-        """验证代码"""
+        """验证代码（相同规范和代码命中缓存时跳过执行与分析）"""
         spec = input_data.spec
         code = input_data.code
 
+        key = (
+            hashlib.blake2b(spec.model_dump_json().encode('utf-8'), digest_size=16).digest(),
+            hashlib.blake2b(code.encode('utf-8'), digest_size=16).digest(),
+        )
+        with _validation_cache_lock:
+            cached = _validation_cache.get(key)
+            if cached is not None:
+                _validation_cache.move_to_end(key)
+        if cached is not None:
+            return cached.model_copy(deep=True)
+
+        result, cacheable = self._validate(spec, code)
+        if not cacheable:
+            # 超时或执行器异常属于环境问题，不缓存，下次重新执行
+            return result
+
+        with _validation_cache_lock:
+            _validation_cache[key] = result.model_copy(deep=True)
+            if len(_validation_cache) > _VALIDATION_CACHE_SIZE:
+                _validation_cache.popitem(last=False)
+
+        return result
+
+    def _validate(self, spec: FunctionSpec, code: str) -> Tuple[ToolOutput, bool]:
+        """执行用例并检查行有效性
+
+        Returns:
+            (验证结果, 是否可以缓存)；用例执行超时或执行器异常时不可缓存
+        """
         if not spec.examples:
             return ToolOutput.warning_result(
                 data=ValidationResult(
@@ -76,20 +124,10 @@ class ValidateTool(Tool):
                 message="没有测试用例可供验证",
                 code_length=len(code),
                 function_name=spec.name
-            )
-
-        test_results = []
+            ), True
 
-        # 基于规范中的examples生成测试
-        for idx, example in enumerate(spec.examples):
-            result = self._run_single_test(
-                code=code,
-                func_name=spec.name,
-                test_name=f"Example_{idx+1}",
-                inputs=example.inputs,
-                expected_output=example.expected_output
-            )
-            test_results.append(result)
+        # 基于规范中的examples生成测试（一次执行跑完所有用例）
+        test_results, completed = self._run_examples(code, spec)
 
         # 统计结果
         passed_count = sum(1 for r in test_results if r.passed)
@@ -110,17 +148,7 @@ class ValidateTool(Tool):
             test_results=test_results,
             suggestions=suggestions,
             # 【新增】行有效性检查结果
-            line_effectiveness_score=line_effectiveness_report.effectiveness_score,
-            line_effectiveness_analysis={
-                "total_lines": line_effectiveness_report.total_lines,
-                "essential_lines": line_effectiveness_report.essential_lines,
-                "important_lines": line_effectiveness_report.important_lines,
-                "optional_lines": line_effectiveness_report.optional_lines,
-                "redundant_lines": line_effectiveness_report.redundant_lines,
-                "unused_lines": line_effectiveness_report.unused_lines,
-            },
-            has_redundant_code=(line_effectiveness_report.redundant_lines > 0 or
-                               line_effectiveness_report.unused_lines > 0)
+            **self._line_effectiveness_fields(line_effectiveness_report)
         )
 
         # 添加行有效性建议到建议列表
@@ -135,107 +163,133 @@ class ValidateTool(Tool):
                 function_name=spec.name,
                 test_count=total_tests,
                 effectiveness_score=line_effectiveness_report.effectiveness_score
-            )
+            ), completed
         else:
             return ToolOutput.warning_result(
                 data=validation_result,
                 message=f"部分测试失败: {passed_count}/{total_tests}",
                 function_name=spec.name,
                 failed_tests=total_tests - passed_count
-            )
-
-    def _run_single_test(
-        self,
-        code: str,
-        func_name: str,
-        test_name: str,
-        inputs: Dict[str, Any],
-        expected_output: Any
-    ) -> TestResult:
-        """运行单个测试"""
-        # 构建测试代码
-        try:
-            args_str = ", ".join([f"{k}={repr(v)}" for k, v in inputs.items()])
-            test_code = f"""
+            ), completed
+
+    def _line_effectiveness_fields(self, report: CodeEffectivenessReport) -> Dict[str, Any]:
+        """将行有效性报告转换为 ValidationResult 的对应字段"""
+        return {
+            "line_effectiveness_score": report.effectiveness_score,
+            "line_effectiveness_analysis": {
+                "total_lines": report.total_lines,
+                "essential_lines": report.essential_lines,
+                "important_lines": report.important_lines,
+                "optional_lines": report.optional_lines,
+                "redundant_lines": report.redundant_lines,
+                "unused_lines": report.unused_lines,
+            },
+            "has_redundant_code": report.redundant_lines > 0 or report.unused_lines > 0,
+        }
+
+    def _run_examples(self, code: str, spec: FunctionSpec) -> Tuple[List[TestResult], bool]:
+        """在一次执行中运行所有示例用例
+
+        代码只编译、执行一次，然后在同一命名空间中依次调用函数，
+        每个用例的结果（返回值的repr或异常信息）汇总后一次性输出。
+
+        注意：
+        - 用例之间不隔离：模块级全局状态、被修改的可变默认参数等会带到后续用例
+        - 所有用例共享执行器的一次超时（30秒），任一用例超时会使全部用例失败；
+          单个用例抛出的异常只影响该用例
+
+        Returns:
+            (测试结果, 执行是否完成)；超时或执行器异常时为False
+        """
+        examples = spec.examples
+        call_args = [example.inputs for example in examples]
+        # 驱动代码运行在沙箱中：不能出现双下划线，也不能使用被禁止的内置函数名
+        test_code = f"""
 {code}
 
 # 运行测试
-try:
-    result = {func_name}({args_str})
-    print("RESULT:", repr(result))
-except Exception as e:
-    print("ERROR:", str(e))
-    print("ERROR_TYPE:", type(e).__name__)
+_cases = {call_args!r}
+_results = []
+for _kwargs in _cases:
+    try:
+        _results.append(("RESULT", repr({spec.name}(**_kwargs))))
+    except Exception as _e:
+        _results.append(("ERROR", str(_e)))
+print("{self.RESULTS_MARKER}" + repr(_results))
 """
 
+        try:
             exec_result = self.executor.run(test_code)
+        except Exception as e:
+            return self._failed_results(examples, f"测试执行异常: {str(e)}"), False
 
-            if exec_result.status == ExecutionStatus.SUCCESS:
-                # 解析输出
-                output = exec_result.stdout.strip()
-
-                if output.startswith("RESULT:"):
-                    actual_output_str = output.replace("RESULT:", "").strip()
-                    try:
-                        actual_output = eval(actual_output_str)
-                        passed = actual_output == expected_output
-
-                        return TestResult(
-                            test_name=test_name,
-                            passed=passed,
-                            input_values=inputs,
-                            expected_output=expected_output,
-                            actual_output=actual_output,
-                            error=None if passed else f"期望 {expected_output}, 实际 {actual_output}"
-                        )
-                    except Exception as e:
-                        return TestResult(
-                            test_name=test_name,
-                            passed=False,
-                            input_values=inputs,
-                            expected_output=expected_output,
-                            error=f"无法解析输出: {actual_output_str}"
-                        )
-                elif "ERROR:" in output:
-                    error_lines = output.split('\n')
-                    error_msg = ""
-                    for line in error_lines:
-                        if line.startswith("ERROR:"):
-                            error_msg = line.replace("ERROR:", "").strip()
-                            break
-
-                    return TestResult(
-                        test_name=test_name,
-                        passed=False,
-                        input_values=inputs,
-                        expected_output=expected_output,
-                        error=f"运行时异常: {error_msg}"
-                    )
-                else:
-                    return TestResult(
-                        test_name=test_name,
-                        passed=False,
-                        input_values=inputs,
-                        expected_output=expected_output,
-                        error="无法解析函数输出"
-                    )
-            else:
-                return TestResult(
+        if exec_result.status != ExecutionStatus.SUCCESS:
+            completed = exec_result.status != ExecutionStatus.TIMEOUT
+            return self._failed_results(examples, exec_result.error or "代码执行失败"), completed
+
+        outcomes = None
+        for line in reversed(exec_result.stdout.splitlines()):
+            if line.startswith(self.RESULTS_MARKER):
+                try:
+                    outcomes = ast.literal_eval(line[len(self.RESULTS_MARKER):])
+                except (ValueError, SyntaxError):
+                    pass
+                break
+
+        if outcomes is None or len(outcomes) != len(examples):
+            return self._failed_results(examples, "无法解析函数输出"), True
+
+        test_results = []
+        for idx, (example, (kind, payload)) in enumerate(zip(examples, outcomes)):
+            test_name = f"Example_{idx+1}"
+            expected_output = example.expected_output
+
+            if kind == "ERROR":
+                test_results.append(TestResult(
                     test_name=test_name,
                     passed=False,
-                    input_values=inputs,
+                    input_values=example.inputs,
                     expected_output=expected_output,
-                    error=exec_result.error or "代码执行失败"
-                )
+                    error=f"运行时异常: {payload}"
+                ))
+                continue
+
+            try:
+                actual_output = eval(payload)
+            except Exception:
+                test_results.append(TestResult(
+                    test_name=test_name,
+                    passed=False,
+                    input_values=example.inputs,
+                    expected_output=expected_output,
+                    error=f"无法解析输出: {payload}"
+                ))
+                continue
 
-        except Exception as e:
-            return TestResult(
+            passed = actual_output == expected_output
+            test_results.append(TestResult(
                 test_name=test_name,
-                passed=False,
-                input_values=inputs,
+                passed=passed,
+                input_values=example.inputs,
                 expected_output=expected_output,
-                error=f"测试执行异常: {str(e)}"
+                actual_output=actual_output,
+                error=None if passed else f"期望 {expected_output}, 实际 {actual_output}"
+            ))
+
+        return test_results, True
+
+    def _failed_results(self, examples: List, error: str) -> List[TestResult]:
+        """所有用例以相同错误失败时的结果"""
+        return [
+            TestResult(
+                test_name=f"Example_{idx+1}",
+                passed=False,
+                input_values=example.inputs,
+                expected_output=example.expected_output,
+                error=error
             )
+            for idx, example in enumerate(examples)
+        ]
 
     def _generate_suggestions(
         self,
@@ -8,6 +8,7 @@ Worker Agent - 专业化代码生成器
 from typing import Dict, List, Any, Optional, Set
 import re
 import ast
+import threading
 import time
 from dataclasses import dataclass
 
@@ -56,7 +57,8 @@ class WorkerAgent:
         self.expertise_areas = config.expertise_areas or []
         self.preferred_stages = config.preferred_stages or []
 
-        # 性能统计
+        # 性能统计（并发执行的阶段可能同时使用同一个Worker，更新时加锁）
+        self._stats_lock = threading.Lock()
         self.stats = {
             'stages_processed': 0,
             'avg_quality_score': 0.0,
@@ -728,6 +730,11 @@ class WorkerAgent:
 
     def _update_stats(self, stage_output: StageOutput, processing_time: float):
         """更新统计信息"""
+        with self._stats_lock:
+            self._update_stats_locked(stage_output, processing_time)
+
+    def _update_stats_locked(self, stage_output: StageOutput, processing_time: float):
+        """更新统计信息（调用方持有 _stats_lock）"""
         self.stats['stages_processed'] += 1
         self.stats['processing_times'].append(processing_time)
 
@@ -749,14 +756,17 @@ class WorkerAgent:
 
     def get_performance_stats(self) -> Dict[str, Any]:
         """获取性能统计"""
-        if not self.stats['processing_times']:
-            return self.stats
+        with self._stats_lock:
+            stats = {**self.stats, 'processing_times': list(self.stats['processing_times'])}
+
+        if not stats['processing_times']:
+            return stats
 
         import statistics
-        times = self.stats['processing_times']
+        times = stats['processing_times']
 
         return {
-            **self.stats,
+            **stats,
             'avg_processing_time': statistics.mean(times),
             'min_processing_time': min(times),
             'max_processing_time': max(times),